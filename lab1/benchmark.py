@@ -0,0 +1,203 @@
+import sys
+import math
+import json
+import time
+import random
+import string
+import argparse
+import statistics
+from typing import Callable
+
+from main import (
+    ceaser_cipher_encrypt,
+    ceaser_cipher_decrypt,
+    ceaser_cipher_universal_decrypt,
+    vigener_cipher_encrypt,
+    vigener_cipher_decrypt,
+    vigener_cipher_universal_decrypt,
+    find_best_candidate,
+)
+from scoring import default_scorer
+
+
+SAMPLE_TEXT = '''
+    This method is quite basic and might not work well for short or ambiguous texts.
+    For more reliable language detection, especially for short texts or texts that
+    might be in any language, consider using a dedicated language detection library.
+'''
+
+DEFAULT_SIZES = [10 ** i for i in range(3, 9)]
+DEFAULT_KEY_LENGTHS = list(range(1, 7))
+
+
+def make_text(size: int) -> str:
+    """
+    Builds an English text of exactly `size` characters by repeating a sample text.
+
+    Args:
+        size (int): The number of characters.
+
+    Returns:
+        str: The text.
+    """
+    return (SAMPLE_TEXT * (size // len(SAMPLE_TEXT) + 1))[:size]
+
+
+def measure(func: Callable[[], object], repeat: int) -> dict[str, float]:
+    """
+    Runs the function `repeat` times and reports its run times.
+
+    Args:
+        func (Callable[[], object]): The function to measure.
+        repeat (int): The number of runs.
+
+    Returns:
+        dict[str, float]: The median and minimal run time in seconds.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    return {'median_s': statistics.median(times), 'min_s': min(times)}
+
+
+def run_benchmarks(
+        sizes: list[int],
+        key_lengths: list[int],
+        repeat: int = 3,
+        max_analysis_size: int = 10 ** 6
+    ) -> list[dict]:
+    """
+    Benchmarks the ciphers and the cryptanalysis functions on texts of the given sizes.
+    Cryptanalysis is only run on texts up to `max_analysis_size` characters.
+
+    Args:
+        sizes (list[int]): The text sizes in characters.
+        key_lengths (list[int]): The Vigenere key lengths.
+        repeat (int, optional): The number of runs of each benchmark. Defaults to 3.
+        max_analysis_size (int, optional): The largest text to run cryptanalysis on. Defaults to 10**6.
+
+    Returns:
+        list[dict]: One result per benchmark, with its name, text size, key length and run times.
+    """
+    rng = random.Random(0)
+
+    # the scorer is loaded once outside of the measured code
+    default_scorer()
+
+    results = []
+
+    def record(name: str, size: int, key_len: int | None, func: Callable[[], object]) -> None:
+        result = {'name': name, 'size': size, 'key_len': key_len, **measure(func, repeat)}
+        result['mb_per_s'] = size / result['median_s'] / 10 ** 6 if result['median_s'] else None
+        results.append(result)
+        print(
+            f"{name:<36} size={size:<10} key_len={key_len if key_len is not None else '-':<3}"
+            f" median={result['median_s']:.6f}s",
+            file=sys.stderr
+        )
+
+    for size in sizes:
+        text = make_text(size)
+        analyse = size <= max_analysis_size
+
+        encrypted = ceaser_cipher_encrypt(text, 3)
+        record('ceaser_cipher_encrypt', size, None, lambda: ceaser_cipher_encrypt(text, 3))
+        record('ceaser_cipher_decrypt', size, None, lambda: ceaser_cipher_decrypt(encrypted, 3))
+
+        if analyse:
+            record('ceaser_cipher_universal_decrypt', size, None, lambda: ceaser_cipher_universal_decrypt(encrypted))
+
+            candidates = [ceaser_cipher_decrypt(encrypted, k) for k in range(26)]
+            record('find_best_candidate', size, None, lambda: find_best_candidate(candidates))
+
+        for key_len in key_lengths:
+            key = ''.join(rng.choice(string.ascii_lowercase) for _ in range(key_len))
+            encrypted = vigener_cipher_encrypt(text, key)
+
+            record('vigener_cipher_encrypt', size, key_len, lambda: vigener_cipher_encrypt(text, key))
+            record('vigener_cipher_decrypt', size, key_len, lambda: vigener_cipher_decrypt(encrypted, key))
+
+            if analyse:
+                record(
+                    'vigener_cipher_universal_decrypt', size, key_len,
+                    lambda: vigener_cipher_universal_decrypt(encrypted, key_len)
+                )
+
+    return results
+
+
+def compare(results: list[dict], baseline: list[dict], threshold: float) -> list[dict]:
+    """
+    Finds the benchmarks that got slower than the baseline by more than the threshold.
+
+    Args:
+        results (list[dict]): The current results.
+        baseline (list[dict]): The baseline results.
+        threshold (float): The allowed slowdown, e.g. 0.2 for 20%.
+
+    Returns:
+        list[dict]: The regressed benchmarks with their baseline and current median run times.
+    """
+    def key(result: dict) -> tuple:
+        return result['name'], result['size'], result['key_len']
+
+    baseline = {key(result): result for result in baseline}
+
+    regressions = []
+    for result in results:
+        previous = baseline.get(key(result))
+        if previous is None:
+            continue
+
+        if result['median_s'] > previous['median_s'] * (1 + threshold):
+            regressions.append({
+                'name': result['name'],
+                'size': result['size'],
+                'key_len': result['key_len'],
+                'baseline_s': previous['median_s'],
+                'current_s': result['median_s'],
+                # a zero baseline (below the resolution of the timer) makes any measurable time infinitely slower
+                'slowdown': result['median_s'] / previous['median_s'] - 1 if previous['median_s'] else math.inf,
+            })
+
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark lab1 ciphers and cryptanalysis.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='text sizes in characters')
+    parser.add_argument('--key-lengths', type=int, nargs='+', default=DEFAULT_KEY_LENGTHS, help='Vigenere key lengths')
+    parser.add_argument('--repeat', type=int, default=3, help='number of runs of each benchmark')
+    parser.add_argument('--max-analysis-size', type=int, default=10 ** 6, help='largest text to run cryptanalysis on')
+    parser.add_argument('--output', default='benchmark.json', help='where to write the results')
+    parser.add_argument('--baseline', help='results to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed slowdown against the baseline')
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.sizes, args.key_lengths, args.repeat, args.max_analysis_size)
+
+    with open(args.output, 'w') as file:
+        json.dump({'python': sys.version, 'results': results}, file, indent=2)
+
+    if not args.baseline:
+        return 0
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)['results']
+
+    regressions = compare(results, baseline, args.threshold)
+    for regression in regressions:
+        print(
+            f"REGRESSION {regression['name']} size={regression['size']} key_len={regression['key_len']}: "
+            f"{regression['baseline_s']:.6f}s -> {regression['current_s']:.6f}s "
+            f"(+{regression['slowdown']:.0%})"
+        )
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
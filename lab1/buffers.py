@@ -0,0 +1,169 @@
+from functools import lru_cache
+
+import numpy as np
+
+from engine import ALPHABET, ALPHABET_SIZE, key_shifts
+
+
+_A, _Z = ord('a'), ord('z')
+_UPPER_A, _UPPER_Z = ord('A'), ord('Z')
+
+# number of bytes translated at once, small enough to stay in the CPU cache
+TRANSLATE_CHUNK_SIZE = 1 << 16
+
+Buffer = bytes | bytearray | memoryview
+
+
+@lru_cache(maxsize=2 * ALPHABET_SIZE)
+def _caesar_table(k: int, lowercase: bool) -> bytes:
+    lower = ALPHABET.encode()
+    upper = ALPHABET.upper().encode()
+    shifted = lower[k:] + lower[:k]
+
+    return bytes.maketrans(
+        lower + upper, 
+        shifted + (shifted if lowercase else shifted.upper())
+    )
+
+
+def _views(data: Buffer, out: Buffer | None) -> tuple[memoryview, memoryview]:
+    # byte views of the input and the output, without copying either of them
+    src = memoryview(data).cast('B')
+    dst = src if out is None else memoryview(out).cast('B')
+
+    if len(dst) != len(src):
+        raise ValueError('The output buffer must be the same size as the input')
+    if dst.readonly:
+        raise ValueError('The output buffer must be writable, pass `out` for read-only input')
+
+    return src, dst
+
+
+def ceaser_cipher_encrypt_into(
+        data: Buffer,
+        k: int,
+        out: Buffer | None = None,
+        lowercase: bool = False
+    ) -> None:
+    """
+    Encrypts ascii bytes using the Caesar cipher algorithm without decoding them to `str`.
+    Bytes other than ascii letters are left untouched.
+
+    Args:
+        data (Buffer): The bytes to be encrypted, encrypted in place if `out` is not given.
+        k (int): The number of positions to shift each letter.
+        out (Buffer, optional): The writable buffer of the same size to write the encrypted bytes to. Defaults to None.
+        lowercase (bool, optional): Whether to lowercase the letters (as `ceaser_cipher_encrypt` does) instead of preserving their case. Defaults to False.
+    """
+    src, dst = _views(data, out)
+    table = _caesar_table(k % ALPHABET_SIZE, lowercase)
+
+    for start in range(0, len(src), TRANSLATE_CHUNK_SIZE):
+        end = start + TRANSLATE_CHUNK_SIZE
+        dst[start:end] = src[start:end].tobytes().translate(table)
+
+
+def ceaser_cipher_decrypt_into(
+        data: Buffer,
+        k: int,
+        out: Buffer | None = None,
+        lowercase: bool = False
+    ) -> None:
+    """
+    Decrypts ascii bytes using the Caesar cipher algorithm without decoding them to `str`.
+
+    Args:
+        data (Buffer): The bytes to be decrypted, decrypted in place if `out` is not given.
+        k (int): The number of positions original text was shifted.
+        out (Buffer, optional): The writable buffer of the same size to write the decrypted bytes to. Defaults to None.
+        lowercase (bool, optional): Whether to lowercase the letters instead of preserving their case. Defaults to False.
+    """
+    ceaser_cipher_encrypt_into(data, -k, out, lowercase)
+
+
+def _vigenere_chunk(src: np.ndarray, dst: np.ndarray, shifts: np.ndarray, lowercase: bool, offset: int) -> int:
+    lower = (src >= _A) & (src <= _Z)
+    upper = (src >= _UPPER_A) & (src <= _UPPER_Z)
+    positions = np.flatnonzero(lower | upper)
+
+    # bases of the letters before and after the shift
+    bases = np.where(upper[positions], _UPPER_A, _A)
+    out_bases = np.full_like(bases, _A) if lowercase else bases
+
+    # key position of each letter (the key only advances on letters)
+    key_positions = (np.arange(len(positions)) + offset) % len(shifts)
+    letters = (src[positions].astype(np.int64) - bases + shifts[key_positions]) % ALPHABET_SIZE + out_bases
+
+    if dst is not src:
+        dst[:] = src
+    dst[positions] = letters
+
+    return (offset + len(positions)) % len(shifts)
+
+
+def _vigenere_into(
+        data: Buffer,
+        shifts: np.ndarray,
+        out: Buffer | None,
+        lowercase: bool,
+        offset: int
+    ) -> int:
+    src, dst = _views(data, out)
+    src = np.frombuffer(src, dtype=np.uint8)
+    dst = src if out is None else np.frombuffer(dst, dtype=np.uint8)
+
+    # the temporaries take several bytes per letter, so they are only made for a chunk at a time
+    for start in range(0, len(src), TRANSLATE_CHUNK_SIZE):
+        end = start + TRANSLATE_CHUNK_SIZE
+        src_chunk = src[start:end]
+        dst_chunk = src_chunk if dst is src else dst[start:end]
+        offset = _vigenere_chunk(src_chunk, dst_chunk, shifts, lowercase, offset)
+
+    return offset % len(shifts)
+
+
+def vigener_cipher_encrypt_into(
+        data: Buffer,
+        key: str,
+        out: Buffer | None = None,
+        lowercase: bool = False,
+        offset: int = 0
+    ) -> int:
+    """
+    Encrypts ascii bytes using the Vigenere cipher without decoding them to `str`.
+    Bytes other than ascii letters are left untouched and do not advance the key.
+
+    Args:
+        data (Buffer): The bytes to be encrypted, encrypted in place if `out` is not given.
+        key (str): The key used for encryption.
+        out (Buffer, optional): The writable buffer of the same size to write the encrypted bytes to. Defaults to None.
+        lowercase (bool, optional): Whether to lowercase the letters (as `vigener_cipher_encrypt` does) instead of preserving their case. Defaults to False.
+        offset (int, optional): The key position of the first letter, to continue a previous call. Defaults to 0.
+
+    Returns:
+        int: The key position following the last letter, to pass as `offset` of the next call.
+    """
+    return _vigenere_into(data, key_shifts(key.lower()), out, lowercase, offset)
+
+
+def vigener_cipher_decrypt_into(
+        data: Buffer,
+        key: str,
+        out: Buffer | None = None,
+        lowercase: bool = False,
+        offset: int = 0
+    ) -> int:
+    """
+    Decrypts ascii bytes using the Vigenere cipher without decoding them to `str`.
+
+    Args:
+        data (Buffer): The bytes to be decrypted, decrypted in place if `out` is not given.
+        key (str): The key originally used for encryption.
+        out (Buffer, optional): The writable buffer of the same size to write the decrypted bytes to. Defaults to None.
+        lowercase (bool, optional): Whether to lowercase the letters instead of preserving their case. Defaults to False.
+        offset (int, optional): The key position of the first letter, to continue a previous call. Defaults to 0.
+
+    Returns:
+        int: The key position following the last letter, to pass as `offset` of the next call.
+    """
+    return _vigenere_into(data, -key_shifts(key.lower()) % ALPHABET_SIZE, out, lowercase, offset)
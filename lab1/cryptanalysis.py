@@ -0,0 +1,270 @@
+import heapq
+from typing import Iterator
+
+import numpy as np
+
+from engine import ALPHABET, ALPHABET_SIZE, text_to_codes
+
+
+# relative frequencies of letters in English texts
+ENGLISH_FREQUENCIES = np.array([
+    0.08167, 0.01492, 0.02782, 0.04253, 0.12702, 0.02228, 0.02015,  # a-g
+    0.06094, 0.06966, 0.00153, 0.00772, 0.04025, 0.02406, 0.06749,  # h-n
+    0.07507, 0.01929, 0.00095, 0.05987, 0.06327, 0.09056, 0.02758,  # o-u
+    0.00978, 0.02360, 0.00150, 0.01974, 0.00074,                    # v-z
+])
+
+# columns shorter than this are too short for reliable frequency analysis
+MIN_COLUMN_LETTERS = 20
+
+# number of keys re-ranked for texts with too short columns
+SHORT_TEXT_CANDIDATES = ALPHABET_SIZE ** 3
+
+# index of coincidence of English texts and of uniformly random letters
+ENGLISH_IOC = float((ENGLISH_FREQUENCIES ** 2).sum())
+RANDOM_IOC = 1 / ALPHABET_SIZE
+
+# scaled index of coincidence above which the columns of a key length look like English
+ENGLISH_LIKE_IOC = 0.75
+
+# weight of the Kasiski examination relative to the index of coincidence
+KASISKI_WEIGHT = 0.5
+
+# SHIFTED[s, i] is the index of the ciphertext letter that decrypts to `i` with shift `s`
+_SHIFTED = (np.arange(ALPHABET_SIZE)[:, None] + np.arange(ALPHABET_SIZE)[None, :]) % ALPHABET_SIZE
+
+
+def letter_indices(text: str) -> np.ndarray:
+    """
+    Returns the alphabet index of every letter of the text, skipping other characters.
+
+    Args:
+        text (str): The text to analyse.
+
+    Returns:
+        np.ndarray: The alphabet indices (0 for 'a', 25 for 'z').
+    """
+    codes = text_to_codes(text.lower())
+    letters = codes[(codes >= ord('a')) & (codes <= ord('z'))]
+    return letters.astype(np.int64) - ord('a')
+
+
+def chi_squared_shifts(counts: np.ndarray) -> np.ndarray:
+    """
+    Calculates the chi-squared statistic against English letter frequencies
+    for each of the possible shifts of a single Caesar-encrypted column.
+
+    Args:
+        counts (np.ndarray): The letter counts of the column.
+
+    Returns:
+        np.ndarray: The chi-squared statistic of each shift (lower is more English-like).
+    """
+    expected = ENGLISH_FREQUENCIES * max(counts.sum(), 1)
+    observed = counts[_SHIFTED]
+    return (((observed - expected) ** 2) / expected).sum(axis=1)
+
+
+def column_statistics(text: str, key_len: int) -> np.ndarray:
+    """
+    Splits the letters of the text into `key_len` columns (one per key letter)
+    and solves each column independently with the chi-squared statistic.
+
+    Args:
+        text (str): The encrypted text.
+        key_len (int): The length of the key used for encryption.
+
+    Returns:
+        np.ndarray: A `key_len` x 26 array of chi-squared statistics of each shift of each column.
+    """
+    letters = letter_indices(text)
+
+    return np.array([
+        chi_squared_shifts(np.bincount(letters[column::key_len], minlength=ALPHABET_SIZE))
+        for column in range(key_len)
+    ])
+
+
+def likely_keys(text: str, key_len: int) -> Iterator[str]:
+    """
+    Yields Vigenere keys in the increasing order of their total chi-squared statistic.
+    Only 26 * `key_len` statistics are calculated, the keys are enumerated lazily.
+
+    Args:
+        text (str): The encrypted text.
+        key_len (int): The length of the key used for encryption.
+
+    Yields:
+        str: The next most likely key.
+    """
+    statistics = column_statistics(text, key_len)
+    order = np.argsort(statistics, axis=1, kind='stable')
+    ranked = np.take_along_axis(statistics, order, axis=1)
+
+    # best-first search over the rank of the shift chosen in each column
+    start = (0,) * key_len
+    heap = [(ranked[:, 0].sum(), start)]
+    seen = {start}
+
+    while heap:
+        total, ranks = heapq.heappop(heap)
+        yield ''.join(ALPHABET[order[column, rank]] for column, rank in enumerate(ranks))
+
+        for column, rank in enumerate(ranks):
+            if rank + 1 == ALPHABET_SIZE:
+                continue
+
+            next_ranks = ranks[:column] + (rank + 1,) + ranks[column + 1:]
+            if next_ranks in seen:
+                continue
+
+            seen.add(next_ranks)
+            next_total = total - ranked[column, rank] + ranked[column, rank + 1]
+            heapq.heappush(heap, (next_total, next_ranks))
+
+
+def candidate_pool_size(text: str, key_len: int, candidates: int) -> int:
+    """
+    Returns how many of the most likely keys should be re-ranked with the English words scorer.
+    Letter frequencies are not reliable for short columns, so the pool is widened for short texts.
+
+    Args:
+        text (str): The encrypted text.
+        key_len (int): The length of the key used for encryption.
+        candidates (int): The requested number of keys to re-rank.
+
+    Returns:
+        int: The number of keys to re-rank.
+    """
+    if len(letter_indices(text)) < MIN_COLUMN_LETTERS * key_len:
+        candidates = max(candidates, SHORT_TEXT_CANDIDATES)
+
+    return min(candidates, ALPHABET_SIZE ** key_len)
+
+
+def index_of_coincidence(letters: np.ndarray, key_len: int) -> float:
+    """
+    Calculates the average index of coincidence of the columns of the given key length.
+
+    Args:
+        letters (np.ndarray): The alphabet indices of the letters of the text.
+        key_len (int): The key length to split the letters by.
+
+    Returns:
+        float: The average index of coincidence of the columns.
+    """
+    # letter counts of all the columns at once, one row per column
+    columns = np.arange(len(letters)) % key_len
+    counts = np.bincount(
+        columns * ALPHABET_SIZE + letters, 
+        minlength=key_len * ALPHABET_SIZE
+    ).reshape(key_len, ALPHABET_SIZE)
+
+    totals = counts.sum(axis=1)
+    pairs = totals * (totals - 1)
+    valid = pairs > 0
+    if not valid.any():
+        return 0.0
+
+    coincidences = (counts * (counts - 1)).sum(axis=1)
+    return float((coincidences[valid] / pairs[valid]).mean())
+
+
+def repeated_trigram_distances(letters: np.ndarray) -> np.ndarray:
+    """
+    Finds the distances between consecutive occurrences of repeated trigrams (Kasiski examination).
+
+    Args:
+        letters (np.ndarray): The alphabet indices of the letters of the text.
+
+    Returns:
+        np.ndarray: The distances between repeated trigrams.
+    """
+    if len(letters) < 3:
+        return np.empty(0, dtype=np.int64)
+
+    trigrams = (
+        letters[:-2] * ALPHABET_SIZE ** 2 
+        + letters[1:-1] * ALPHABET_SIZE 
+        + letters[2:]
+    )
+
+    # group occurrences of the same trigram next to each other, keeping their positions sorted
+    order = np.argsort(trigrams, kind='stable')
+    same = trigrams[order[1:]] == trigrams[order[:-1]]
+
+    return (order[1:] - order[:-1])[same]
+
+
+def key_length_statistics(text: str, max_key_len: int = 20) -> dict[int, tuple[float, float]]:
+    """
+    Calculates the statistics of each possible key length:
+    the index of coincidence of its columns (scaled so that random letters score 0 and English 1)
+    and the share of repeated trigram distances it divides (Kasiski examination).
+    The letters and the trigram distances are extracted once, then every key length
+    counts the letters of its columns with one `np.bincount` over them.
+
+    Args:
+        text (str): The encrypted text.
+        max_key_len (int, optional): The longest key length to consider. Defaults to 20.
+
+    Returns:
+        dict[int, tuple[float, float]]: The index of coincidence and Kasiski scores of each key length.
+    """
+    letters = letter_indices(text)
+    distances = repeated_trigram_distances(letters)
+
+    # every column needs at least two letters to calculate its index of coincidence
+    max_key_len = max(1, min(max_key_len, len(letters) // 2))
+
+    statistics = {}
+    for key_len in range(1, max_key_len + 1):
+        ioc = index_of_coincidence(letters, key_len)
+        ioc_score = (ioc - RANDOM_IOC) / (ENGLISH_IOC - RANDOM_IOC)
+
+        kasiski_score = (distances % key_len == 0).mean() if len(distances) else 0.0
+
+        statistics[key_len] = (float(ioc_score), float(kasiski_score))
+
+    return statistics
+
+
+def estimate_key_lengths(text: str, max_key_len: int = 20) -> list[int]:
+    """
+    Ranks the possible key lengths of a Vigenere encrypted text, most likely first.
+
+    Lengths whose columns look like English come first. Multiples of such a length
+    look like English as well, so they are ranked after the lengths they are multiples of.
+    The rest are ranked by the index of coincidence and Kasiski scores combined.
+
+    Args:
+        text (str): The encrypted text.
+        max_key_len (int, optional): The longest key length to consider. Defaults to 20.
+
+    Returns:
+        list[int]: The key lengths, most likely first.
+    """
+    statistics = key_length_statistics(text, max_key_len)
+
+    def score(key_len: int) -> float:
+        ioc_score, kasiski_score = statistics[key_len]
+        return ioc_score + KASISKI_WEIGHT * kasiski_score
+
+    english_like = [
+        key_len 
+        for key_len, (ioc_score, _) in statistics.items() 
+        if ioc_score >= ENGLISH_LIKE_IOC
+    ]
+    periods = [
+        key_len 
+        for key_len in english_like 
+        if not any(key_len % period == 0 for period in english_like if period < key_len)
+    ]
+    multiples = [key_len for key_len in english_like if key_len not in periods]
+    others = [key_len for key_len in statistics if key_len not in english_like]
+
+    return (
+        sorted(periods, key=score, reverse=True) 
+        + multiples 
+        + sorted(others, key=score, reverse=True)
+    )
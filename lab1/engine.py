@@ -0,0 +1,264 @@
+import string
+from functools import lru_cache
+
+import numpy as np
+
+
+ALPHABET = string.ascii_lowercase
+ALPHABET_SIZE = len(ALPHABET)
+
+_A = ord('a')
+_Z = ord('z')
+
+
+@lru_cache(maxsize=ALPHABET_SIZE)
+def caesar_str_table(k: int) -> dict[int, int]:
+    """
+    Returns a `str.translate` table shifting lowercase letters by `k` positions.
+
+    Args:
+        k (int): The number of positions to shift each letter.
+
+    Returns:
+        dict[int, int]: The translation table.
+    """
+    k %= ALPHABET_SIZE
+    return str.maketrans(ALPHABET, ALPHABET[k:] + ALPHABET[:k])
+
+
+@lru_cache(maxsize=ALPHABET_SIZE)
+def caesar_bytes_table(k: int) -> bytes:
+    """
+    Returns a `bytes.translate` table shifting lowercase letters by `k` positions.
+
+    Args:
+        k (int): The number of positions to shift each letter.
+
+    Returns:
+        bytes: The 256-byte translation table.
+    """
+    k %= ALPHABET_SIZE
+    alphabet = ALPHABET.encode()
+    return bytes.maketrans(alphabet, alphabet[k:] + alphabet[:k])
+
+
+def caesar_translate(text: str, k: int) -> str:
+    """
+    Shifts every lowercase letter of the text by `k` positions using precomputed tables.
+    Other characters are left untouched.
+
+    Args:
+        text (str): The text to be shifted.
+        k (int): The number of positions to shift each letter.
+
+    Returns:
+        str: The shifted text.
+    """
+    k %= ALPHABET_SIZE
+
+    # ascii text goes through the much faster bytes path
+    if text.isascii():
+        return text.encode('ascii').translate(caesar_bytes_table(k)).decode('ascii')
+
+    return text.translate(caesar_str_table(k))
+
+
+def key_shifts(key: str) -> np.ndarray:
+    """
+    Converts a Vigenere key into an array of shifts.
+
+    Args:
+        key (str): The key consisting of lowercase letters only.
+
+    Returns:
+        np.ndarray: The shift of each key letter.
+
+    Raises:
+        ValueError: If the key is empty or contains characters other than lowercase letters.
+    """
+    if not key:
+        raise ValueError('Key must not be empty')
+    if not (key.isascii() and key.isalpha() and key.islower()):
+        raise ValueError('Key must consist of lowercase letters only')
+
+    return np.frombuffer(key.encode('ascii'), dtype=np.uint8).astype(np.int64) - _A
+
+
+def text_to_codes(text: str) -> np.ndarray:
+    """
+    Converts the text into a writable array of character codes.
+    Ascii text is stored one byte per character, anything else as utf-32 code points.
+
+    Args:
+        text (str): The text to convert.
+
+    Returns:
+        np.ndarray: The character codes.
+    """
+    if text.isascii():
+        return np.frombuffer(text.encode('ascii'), dtype=np.uint8).copy()
+    return np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32).copy()
+
+
+def codes_to_text(codes: np.ndarray) -> str:
+    """
+    Converts an array produced by `text_to_codes` back into text.
+
+    Args:
+        codes (np.ndarray): The character codes.
+
+    Returns:
+        str: The text.
+    """
+    if codes.dtype == np.uint8:
+        return codes.tobytes().decode('ascii')
+    return codes.tobytes().decode('utf-32-le')
+
+
+def vigenere_shift_codes(codes: np.ndarray, shifts: np.ndarray, offset: int = 0) -> int:
+    """
+    Shifts lowercase letters of the code array in place, cycling through `shifts`.
+    The key advances only on letters, the same as in `vigener_cipher_encrypt`.
+
+    Args:
+        codes (np.ndarray): The character codes to shift in place.
+        shifts (np.ndarray): The shift of each key letter.
+        offset (int, optional): The key position of the first letter. Defaults to 0.
+
+    Returns:
+        int: The key position following the last letter.
+    """
+    mask = (codes >= _A) & (codes <= _Z)
+    letters = codes[mask].astype(np.int64)
+    if not len(letters):
+        return offset
+
+    # key position of each letter (the key only advances on letters)
+    positions = (np.arange(len(letters)) + offset) % len(shifts)
+    letters = (letters - _A + shifts[positions]) % ALPHABET_SIZE + _A
+    codes[mask] = letters
+
+    return (offset + len(letters)) % len(shifts)
+
+
+def vigenere_translate(text: str, key: str) -> str:
+    """
+    Shifts every lowercase letter of the text by the matching letter of the cycled key.
+    Other characters are left untouched and do not advance the key.
+
+    Args:
+        text (str): The text to be shifted.
+        key (str): The key consisting of lowercase letters only.
+
+    Returns:
+        str: The shifted text.
+    """
+    codes = text_to_codes(text)
+    vigenere_shift_codes(codes, key_shifts(key))
+    return codes_to_text(codes)
+
+
+def pack_texts(texts: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Packs the texts into a single array of character codes.
+
+    Args:
+        texts (list[str]): The texts to pack.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The character codes and the offsets of the texts
+            (text `i` spans from `offsets[i]` to `offsets[i + 1]`).
+    """
+    lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+    offsets = np.concatenate(([0], np.cumsum(lengths)))
+    return text_to_codes(''.join(texts)), offsets
+
+
+def unpack_texts(codes: np.ndarray, offsets: np.ndarray) -> list[str]:
+    """
+    Splits an array packed with `pack_texts` back into texts.
+
+    Args:
+        codes (np.ndarray): The character codes.
+        offsets (np.ndarray): The offsets of the texts.
+
+    Returns:
+        list[str]: The texts.
+    """
+    text = codes_to_text(codes)
+    offsets = offsets.tolist()
+    return [text[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+
+
+def caesar_translate_batch(texts: list[str], shifts: list[int]) -> list[str]:
+    """
+    Shifts every lowercase letter of each text by the matching shift, all texts at once.
+
+    Args:
+        texts (list[str]): The texts to be shifted.
+        shifts (list[int]): The number of positions to shift the letters of each text.
+
+    Returns:
+        list[str]: The shifted texts, in the same order.
+    """
+    if len(texts) != len(shifts):
+        raise ValueError('There must be exactly one shift for each text')
+
+    codes, offsets = pack_texts(texts)
+    char_shifts = np.repeat(np.asarray(shifts, dtype=np.int64) % ALPHABET_SIZE, np.diff(offsets))
+
+    mask = (codes >= _A) & (codes <= _Z)
+    codes[mask] = (codes[mask].astype(np.int64) - _A + char_shifts[mask]) % ALPHABET_SIZE + _A
+
+    return unpack_texts(codes, offsets)
+
+
+def vigenere_translate_batch(texts: list[str], keys: list[str], inverse: bool = False) -> list[str]:
+    """
+    Shifts every lowercase letter of each text by the matching letter of its own cycled key,
+    all texts at once.
+
+    Args:
+        texts (list[str]): The texts to be shifted.
+        keys (list[str]): The key of each text, consisting of lowercase letters only.
+        inverse (bool, optional): Whether to shift the letters backwards (decryption). Defaults to False.
+
+    Returns:
+        list[str]: The shifted texts, in the same order.
+
+    Raises:
+        ValueError: If any key is empty or contains characters other than lowercase letters.
+    """
+    if len(texts) != len(keys):
+        raise ValueError('There must be exactly one key for each text')
+    if not texts:
+        return []
+
+    codes, offsets = pack_texts(texts)
+
+    # all the keys are validated and converted at once
+    packed_keys, key_offsets = pack_texts(keys)
+    key_lens = np.diff(key_offsets)
+    if not key_lens.all():
+        raise ValueError('Key must not be empty')
+    if not ((packed_keys >= _A) & (packed_keys <= _Z)).all():
+        raise ValueError('Key must consist of lowercase letters only')
+
+    packed_keys = packed_keys.astype(np.int64) - _A
+    if inverse:
+        packed_keys = -packed_keys % ALPHABET_SIZE
+
+    mask = (codes >= _A) & (codes <= _Z)
+    positions = np.flatnonzero(mask)
+    if not len(positions):
+        return list(texts)
+
+    # text of each letter and the position of the letter among the letters of its text
+    text_ids = np.searchsorted(offsets, positions, side='right') - 1
+    letters_before = np.concatenate(([0], np.cumsum(mask)))[offsets[:-1]]
+    ranks = np.arange(len(positions)) - letters_before[text_ids]
+
+    shifts = packed_keys[key_offsets[:-1][text_ids] + ranks % key_lens[text_ids]]
+    codes[positions] = (codes[positions].astype(np.int64) - _A + shifts) % ALPHABET_SIZE + _A
+
+    return unpack_texts(codes, offsets)
@@ -1,7 +1,11 @@
 import string
 import itertools
 
-from nltk.corpus import words
+from engine import caesar_translate, caesar_translate_batch, vigenere_translate, vigenere_translate_batch
+from cryptanalysis import candidate_pool_size, estimate_key_lengths, likely_keys
+from scoring import Scorer, default_scorer
+from search import top_candidates
+from parallel import parallel_key_search
 
 
 ALPHABET = list(string.ascii_lowercase)
@@ -21,16 +25,7 @@ def ceaser_cipher_encrypt(text: str, k: int) -> str:
     """
     text = text.lower()
 
-    # helper function to encrypt a single character
-    def encrypt_char(char: str) -> str:
-        if char in ALPHABET_DICT:
-            return ALPHABET[(ALPHABET_DICT[char] + k) % len(ALPHABET)]
-        return char
-
-    return ''.join( 
-        encrypt_char(char)
-        for char in text
-    )
+    return caesar_translate(text, k)
 
 
 def ceaser_cipher_decrypt(text: str, k: int) -> str:
@@ -47,29 +42,85 @@ def ceaser_cipher_decrypt(text: str, k: int) -> str:
     return ceaser_cipher_encrypt(text, -k)
 
 
-def ceaser_cipher_universal_decrypt(text: str) -> str:
+def ceaser_cipher_encrypt_batch(texts: list[str], shifts: list[int]) -> list[str]:
+    """
+    Encrypts many texts at once using the Caesar cipher algorithm, each with its own shift.
+    All texts are processed together, so the cost per text shrinks as the batch grows.
+
+    Args:
+        texts (list[str]): The texts to be encrypted.
+        shifts (list[int]): The number of positions to shift the characters of each text.
+
+    Returns:
+        list[str]: The encrypted texts, in the same order.
+    """
+    texts = [text.lower() for text in texts]
+
+    return caesar_translate_batch(texts, shifts)
+
+
+def ceaser_cipher_decrypt_batch(texts: list[str], shifts: list[int]) -> list[str]:
+    """
+    Decrypts many texts at once using the Caesar cipher algorithm, each with its own shift.
+
+    Args:
+        texts (list[str]): The texts to be decrypted.
+        shifts (list[int]): The number of positions each original text was shifted.
+
+    Returns:
+        list[str]: The decrypted texts, in the same order.
+    """
+    return ceaser_cipher_encrypt_batch(texts, [-k for k in shifts])
+
+
+def ceaser_cipher_universal_decrypt(text: str, scorer: Scorer | None = None) -> str:
     """
     Decrypts a Caesar cipher encrypted text using a brute force approach.
     Finds the best match by counting English words among the decrypted texts.
 
     Args:
         text (str): The text to be decrypted.
+        scorer (Scorer, optional): The scorer to rank the decrypted texts with. Defaults to the shared English words scorer.
 
     Returns:
         str: The decrypted text.
     """
+    _, _, decrypted = ceaser_cipher_candidates(text, top_k=1, scorer=scorer)[0]
+    return decrypted
+
+
+def ceaser_cipher_candidates(
+        text: str, 
+        top_k: int = 5, 
+        threshold: float | None = None, 
+        scorer: Scorer | None = None
+    ) -> list[tuple[int, float, str]]:
+    """
+    Decrypts a Caesar cipher encrypted text with every shift and returns the best scoring candidates.
+    The candidates are decrypted and scored one at a time, only the `top_k` best are kept.
+
+    Args:
+        text (str): The text to be decrypted.
+        top_k (int, optional): The number of best candidates to return. Defaults to 5.
+        threshold (float, optional): Stop the search once a candidate scores at least this much. Defaults to None.
+        scorer (Scorer, optional): The scorer to rank the decrypted texts with. Defaults to the shared English words scorer.
+
+    Returns:
+        list[tuple[int, float, str]]: The (shift, score, decrypted text) of the best candidates, best first.
+    """
     text = text.lower()
 
     # remove punctuation
     for p in string.punctuation:
         text = text.replace(p, '')
 
-    candidates = [
-        ceaser_cipher_decrypt(text, k) 
-        for k in range(len(ALPHABET))
-    ]
-
-    return find_best_candidate(candidates)
+    return top_candidates(
+        range(len(ALPHABET)), 
+        lambda k: ceaser_cipher_decrypt(text, k), 
+        scorer or default_scorer(), 
+        top_k, 
+        threshold
+    )
         
 
 def vigener_cipher_encrypt(text: str, key: str) -> str:
@@ -85,17 +136,8 @@ def vigener_cipher_encrypt(text: str, key: str) -> str:
     """
     text = text.lower()
     key = key.lower()
-    key = itertools.cycle(key)
 
-    def encrypt_char(char: str) -> str:
-        if char in ALPHABET_DICT:
-            return ceaser_cipher_encrypt(char, ALPHABET_DICT[next(key)])
-        return char
-    
-    return ''.join(
-        encrypt_char(char)
-        for char in text
-    )
+    return vigenere_translate(text, key)
 
 
 def vigener_cipher_decrypt(text: str, key: str) -> str:
@@ -118,45 +160,187 @@ def vigener_cipher_decrypt(text: str, key: str) -> str:
     return vigener_cipher_encrypt(text, new_key)
 
 
-def vigener_cipher_universal_decrypt(text: str, key_len: int) -> str:
+def vigener_cipher_encrypt_batch(texts: list[str], keys: list[str]) -> list[str]:
     """
-    Decrypts a Vigener cipher encrypted text using a brute force approach.
-    Finds the best match by counting English words among the decrypted texts.
+    Encrypts many texts at once using the Vigenere cipher, each with its own key.
+    All texts are packed into a single buffer, so the cost per text shrinks as the batch grows.
+
+    Args:
+        texts (list[str]): The texts to be encrypted.
+        keys (list[str]): The key used for encryption of each text.
+
+    Returns:
+        list[str]: The encrypted texts, in the same order.
+    """
+    texts = [text.lower() for text in texts]
+    keys = [key.lower() for key in keys]
+
+    return vigenere_translate_batch(texts, keys)
+
+
+def vigener_cipher_decrypt_batch(texts: list[str], keys: list[str]) -> list[str]:
+    """
+    Decrypts many texts at once using the Vigenere cipher, each with its original key.
+
+    Args:
+        texts (list[str]): The texts to be decrypted.
+        keys (list[str]): The key originally used for encryption of each text.
+
+    Returns:
+        list[str]: The decrypted texts, in the same order.
+    """
+    texts = [text.lower() for text in texts]
+    keys = [key.lower() for key in keys]
+
+    return vigenere_translate_batch(texts, keys, inverse=True)
+
+
+def vigener_cipher_universal_decrypt(
+        text: str, 
+        key_len: int, 
+        candidates: int = 10, 
+        exhaustive: bool = False,
+        scorer: Scorer | None = None,
+        workers: int | None = 1
+    ) -> str:
+    """
+    Decrypts a Vigener cipher encrypted text using frequency analysis.
+    Each key letter is solved independently with the chi-squared statistic against
+    English letter frequencies, then the few most likely keys are re-ranked
+    by counting English words among the decrypted texts.
 
     Args:
         text (str): The text to be decrypted.
         key_len (int): The length of the key used for encryption.
+        candidates (int, optional): The number of most likely keys to re-rank. Defaults to 10.
+        exhaustive (bool, optional): Whether to try every possible key instead (26^key_len decryptions). Defaults to False.
+        scorer (Scorer, optional): The scorer to re-rank the decrypted texts with. Defaults to the shared English words scorer.
+        workers (int, optional): The number of processes to split the exhaustive search across, `None` for one per CPU. Defaults to 1.
     Returns:
         str: The decrypted text.
     """
-    possible_keys = itertools.product(ALPHABET, repeat=key_len)
+    _, _, decrypted = vigener_cipher_candidates(
+        text, 
+        key_len, 
+        top_k=1, 
+        candidates=candidates, 
+        exhaustive=exhaustive, 
+        scorer=scorer,
+        workers=workers
+    )[0]
+    return decrypted
+
+
+def vigener_cipher_candidates(
+        text: str, 
+        key_len: int, 
+        top_k: int = 5, 
+        threshold: float | None = None, 
+        candidates: int = 10, 
+        exhaustive: bool = False,
+        scorer: Scorer | None = None,
+        workers: int | None = 1
+    ) -> list[tuple[str, float, str]]:
+    """
+    Decrypts a Vigener cipher encrypted text with the most likely keys (or every key) 
+    and returns the best scoring candidates.
+    The candidates are decrypted and scored one at a time, only the `top_k` best are kept.
+
+    Args:
+        text (str): The text to be decrypted.
+        key_len (int): The length of the key used for encryption.
+        top_k (int, optional): The number of best candidates to return. Defaults to 5.
+        threshold (float, optional): Stop the search once a candidate scores at least this much. Defaults to None.
+        candidates (int, optional): The number of most likely keys to re-rank. Defaults to 10.
+        exhaustive (bool, optional): Whether to try every possible key instead (26^key_len decryptions). Defaults to False.
+        scorer (Scorer, optional): The scorer to rank the decrypted texts with. Defaults to the shared English words scorer.
+        workers (int, optional): The number of processes to split the exhaustive search across, `None` for one per CPU. Defaults to 1.
+
+    Returns:
+        list[tuple[str, float, str]]: The (key, score, decrypted text) of the best candidates, best first.
+    """
+    scorer = scorer or default_scorer()
+
+    if exhaustive and workers != 1:
+        return parallel_key_search(text, key_len, scorer, top_k, threshold, workers)
+
+    if exhaustive:
+        possible_keys = (
+            ''.join(key) 
+            for key in itertools.product(ALPHABET, repeat=key_len)
+        )
+    else:
+        possible_keys = itertools.islice(
+            likely_keys(text, key_len), 
+            candidate_pool_size(text, key_len, candidates)
+        )
+
+    return top_candidates(
+        possible_keys, 
+        lambda key: vigener_cipher_decrypt(text, key), 
+        scorer, 
+        top_k, 
+        threshold
+    )
+
+
+def vigener_cipher_auto_decrypt(
+        text: str, 
+        max_key_len: int = 20, 
+        lengths: int = 3, 
+        candidates: int = 10,
+        scorer: Scorer | None = None
+    ) -> str:
+    """
+    Decrypts a Vigener cipher encrypted text without knowing the key length.
+    Key lengths are ranked using the index of coincidence and the Kasiski examination,
+    only the few most likely ones are solved with frequency analysis.
 
-    candidates = [
-        vigener_cipher_decrypt(text, ''.join(key)) 
-        for key in possible_keys
-    ]
+    Args:
+        text (str): The text to be decrypted.
+        max_key_len (int, optional): The longest key length to consider. Defaults to 20.
+        lengths (int, optional): The number of most likely key lengths to solve. Defaults to 3.
+        candidates (int, optional): The number of most likely keys to re-rank for each key length. Defaults to 10.
+        scorer (Scorer, optional): The scorer to re-rank the decrypted texts with. Defaults to the shared English words scorer.
 
-    return find_best_candidate(candidates)
+    Returns:
+        str: The decrypted text.
+    """
+    key_lens = estimate_key_lengths(text, max_key_len)[:lengths]
+
+    possible_keys = itertools.chain.from_iterable(
+        itertools.islice(
+            likely_keys(text, key_len), 
+            candidate_pool_size(text, key_len, candidates)
+        )
+        for key_len in key_lens
+    )
+
+    _, _, decrypted = top_candidates(
+        possible_keys, 
+        lambda key: vigener_cipher_decrypt(text, key), 
+        scorer or default_scorer(), 
+        top_k=1
+    )[0]
+    return decrypted
 
 
-def find_best_candidate(candidates: list[str]) -> str:
+def find_best_candidate(candidates: list[str], scorer: Scorer | None = None) -> str:
     """
     Finds the best candidate from a list of candidates based on the score.
-    The score is calculated by counting the number of English words in the text.
+    By default the score is the share of English words in the text.
 
     Args:
         candidates (list[str]): The list of candidates to choose from.
+        scorer (Scorer, optional): The scorer to rank the candidates with. Defaults to the shared English words scorer.
 
     Returns:
         str: The best candidate.
 
     """
-    words_set = set(words.words())
-
-    def score(text: str) -> int:
-        return sum(word in words_set for word in text.split())
+    scorer = scorer or default_scorer()
     
-    return max(candidates, key=score)
+    return max(candidates, key=scorer.score)
 
 
 if __name__ == '__main__':    
@@ -200,3 +384,6 @@ if __name__ == '__main__':
     vigenere_decrypted = vigener_cipher_universal_decrypt(vigenere_encrypted, len(key))
     print('vigenere universal decrypted: ', vigenere_decrypted)
 
+    vigenere_decrypted = vigener_cipher_auto_decrypt(vigenere_encrypted)
+    print('vigenere auto decrypted: ', vigenere_decrypted)
+
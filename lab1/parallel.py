@@ -0,0 +1,136 @@
+import os
+import itertools
+import multiprocessing
+from typing import Iterator
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from engine import ALPHABET, ALPHABET_SIZE, codes_to_text, key_shifts, text_to_codes, vigenere_shift_codes
+from scoring import Scorer
+from search import top_candidates
+
+
+# number of keys tried between checks whether another worker already found a confident match
+CANCELLATION_CHECK_INTERVAL = 1024
+
+# state of each worker process, set once by `_init_worker`
+_codes: np.ndarray | None = None
+_scorer: Scorer | None = None
+_found = None
+
+
+def _init_worker(text: str, scorer: Scorer, found) -> None:
+    global _codes, _scorer, _found
+    _codes = text_to_codes(text.lower())
+    _scorer = scorer
+    _found = found
+
+
+def _decrypt(key: str) -> str:
+    codes = _codes.copy()
+    vigenere_shift_codes(codes, -key_shifts(key) % ALPHABET_SIZE)
+    return codes_to_text(codes)
+
+
+def _keys(prefix: str, key_len: int) -> Iterator[str]:
+    suffixes = itertools.product(ALPHABET, repeat=key_len - len(prefix))
+    for i, suffix in enumerate(suffixes):
+        if i % CANCELLATION_CHECK_INTERVAL == 0 and _found.is_set():
+            return
+        yield prefix + ''.join(suffix)
+
+
+def _search_prefix(
+        prefix: str,
+        key_len: int,
+        top_k: int,
+        threshold: float | None
+    ) -> list[tuple[str, float, str]]:
+    candidates = top_candidates(_keys(prefix, key_len), _decrypt, _scorer, top_k, threshold)
+
+    # let the other workers stop early
+    if threshold is not None and candidates and candidates[0][1] >= threshold:
+        _found.set()
+
+    return candidates
+
+
+def prefix_length(key_len: int, workers: int) -> int:
+    """
+    Returns the length of the key prefixes to split the key space by,
+    so that there are at least four tasks for each worker.
+
+    Args:
+        key_len (int): The length of the keys.
+        workers (int): The number of worker processes.
+
+    Returns:
+        int: The length of the prefixes.
+    """
+    length = 1
+    while ALPHABET_SIZE ** length < 4 * workers and length < key_len:
+        length += 1
+    return min(length, key_len)
+
+
+def parallel_key_search(
+        text: str,
+        key_len: int,
+        scorer: Scorer,
+        top_k: int = 5,
+        threshold: float | None = None,
+        workers: int | None = None
+    ) -> list[tuple[str, float, str]]:
+    """
+    Tries every Vigenere key of the given length, splitting the key space by key prefix
+    across a pool of processes. Each worker receives the text and the scorer once at startup
+    and returns its own best candidates, which are merged here.
+
+    Without a threshold the result is the same as the one of the sequential search.
+    With a threshold, the search is cancelled in all the workers once a confident match is found.
+
+    Args:
+        text (str): The text to be decrypted.
+        key_len (int): The length of the key used for encryption.
+        scorer (Scorer): The scorer to rank the decrypted texts with.
+        top_k (int, optional): The number of best candidates to return. Defaults to 5.
+        threshold (float, optional): Stop the search once a candidate scores at least this much. Defaults to None.
+        workers (int, optional): The number of worker processes. Defaults to the number of CPUs.
+
+    Returns:
+        list[tuple[str, float, str]]: The (key, score, decrypted text) of the best candidates, best first.
+    """
+    workers = workers or os.cpu_count() or 1
+    prefixes = (
+        ''.join(prefix)
+        for prefix in itertools.product(ALPHABET, repeat=prefix_length(key_len, workers))
+    )
+
+    context = multiprocessing.get_context()
+    found = context.Event()
+    results = []
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(text, scorer, found)
+    ) as executor:
+        futures = [
+            executor.submit(_search_prefix, prefix, key_len, top_k, threshold)
+            for prefix in prefixes
+        ]
+
+        for future in as_completed(futures):
+            candidates = future.result()
+            results.extend(candidates)
+
+            if threshold is not None and any(score >= threshold for _, score, _ in candidates):
+                found.set()
+                for pending in futures:
+                    pending.cancel()
+                break
+
+    # keys are enumerated in alphabetical order, so ties are resolved the same way as in the sequential search
+    return sorted(results, key=lambda candidate: (-candidate[1], candidate[0]))[:top_k]
@@ -0,0 +1,261 @@
+import os
+import pickle
+import tempfile
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import IO, Iterable, Iterator, Protocol
+
+import numpy as np
+
+from engine import ALPHABET_SIZE
+from cryptanalysis import letter_indices
+
+
+# where the English words scorer is cached between runs
+WORDS_CACHE = os.getenv(
+    'WORDS_CACHE',
+    os.path.join(os.path.expanduser('~'), '.cache', 'krypto-labs', 'words.pickle')
+)
+# bumped whenever the format of the cache changes, older caches are rebuilt
+WORDS_CACHE_VERSION = 1
+
+
+@contextmanager
+def _atomic_open(path: str) -> Iterator[IO[bytes]]:
+    # written next to the target and renamed over it, so readers never see a partial file
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            yield file
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+class Scorer(Protocol):
+    """
+    Scores how much a text looks like English, higher is better.
+    """
+    def score(self, text: str) -> float: ...
+
+
+def _fingerprint(path: str) -> tuple[str, int, int]:
+    stat = os.stat(path)
+    return path, stat.st_size, stat.st_mtime_ns
+
+
+class WordScorer:
+    """
+    Scores texts by the share of their words found in an English dictionary.
+
+    Attributes:
+        words (frozenset[str]): The English words.
+        source (tuple[str, int, int] | None): The path, size and modification time of the corpus the words come from, if known.
+    """
+    def __init__(self, words: Iterable[str], source: tuple[str, int, int] | None = None):
+        self.words = frozenset(words)
+        self.source = source
+
+    @classmethod
+    def from_nltk(cls) -> 'WordScorer':
+        """
+        Builds the scorer from the `words` corpus of `nltk`.
+
+        Raises:
+            LookupError: If the corpus is not downloaded.
+        """
+        from nltk.corpus import words
+        corpus_words = words.words()
+
+        # the corpus is either a directory or a zip file
+        root = words.root
+        path = getattr(root, 'path', None) or getattr(getattr(root, 'zipfile', None), 'filename', None)
+        try:
+            source = _fingerprint(path) if path else None
+        except OSError:
+            source = None
+
+        return cls(corpus_words, source)
+
+    @classmethod
+    def load(cls, path: str) -> 'WordScorer':
+        """
+        Loads the scorer saved with `save`. The words are unpickled as a ready-made set, without parsing.
+
+        Args:
+            path (str): The path to the saved scorer.
+
+        Raises:
+            ValueError: If the file was saved in another version of the format.
+        """
+        with open(path, 'rb') as file:
+            data = pickle.load(file)
+
+        if not isinstance(data, dict) or data.get('version') != WORDS_CACHE_VERSION:
+            raise ValueError(f'Not a words cache of version {WORDS_CACHE_VERSION}: {path}')
+
+        return cls(data['words'], data['source'])
+
+    def save(self, path: str) -> None:
+        """
+        Saves the scorer as a pickled set of words, with the version of the format and the source of the words.
+
+        Args:
+            path (str): The path to save the scorer to.
+        """
+        data = {'version': WORDS_CACHE_VERSION, 'source': self.source, 'words': self.words}
+        with _atomic_open(path) as file:
+            pickle.dump(data, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def is_stale(self) -> bool:
+        """
+        Checks whether the corpus the words come from has changed (or is gone) since the scorer was built.
+        """
+        if self.source is None:
+            return False
+        try:
+            return _fingerprint(self.source[0]) != self.source
+        except OSError:
+            return True
+
+    def score(self, text: str) -> float:
+        """
+        Calculates the share of the words of the text that are English words.
+
+        Args:
+            text (str): The text to score.
+
+        Returns:
+            float: The share of English words, from 0 to 1.
+        """
+        text_words = text.split()
+        if not text_words:
+            return 0.0
+        return sum(word in self.words for word in text_words) / len(text_words)
+
+
+class QuadgramScorer:
+    """
+    Scores texts by the average log-probability of their quadgrams (sequences of four letters).
+    Only letters are taken into account, so texts without spaces are scored as well.
+    """
+    def __init__(self, log_probabilities: np.ndarray):
+        self.log_probabilities = log_probabilities
+
+    @staticmethod
+    def quadgram_indices(text: str) -> np.ndarray:
+        """
+        Returns the index of every quadgram of the letters of the text.
+
+        Args:
+            text (str): The text to split into quadgrams.
+
+        Returns:
+            np.ndarray: The quadgram indices, from 0 to 26^4 - 1.
+        """
+        letters = letter_indices(text)
+        return (
+            letters[:-3] * ALPHABET_SIZE ** 3
+            + letters[1:-2] * ALPHABET_SIZE ** 2
+            + letters[2:-1] * ALPHABET_SIZE
+            + letters[3:]
+        )
+
+    @classmethod
+    def from_text(cls, text: str) -> 'QuadgramScorer':
+        """
+        Builds the scorer from the quadgram counts of a sample English text.
+        Quadgrams missing from the sample get the probability of a tenth of a single occurrence.
+
+        Args:
+            text (str): The sample English text.
+        """
+        quadgrams = cls.quadgram_indices(text)
+        counts = np.bincount(quadgrams, minlength=ALPHABET_SIZE ** 4).astype(np.float64)
+        total = max(len(quadgrams), 1)
+
+        counts[counts == 0] = 0.1
+        return cls(np.log10(counts / total).astype(np.float32))
+
+    @classmethod
+    def from_nltk(cls) -> 'QuadgramScorer':
+        """
+        Builds the scorer from the `gutenberg` corpus of `nltk`.
+        """
+        from nltk.corpus import gutenberg
+        return cls.from_text(gutenberg.raw())
+
+    @classmethod
+    def load(cls, path: str) -> 'QuadgramScorer':
+        """
+        Loads the scorer saved with `save`.
+
+        Args:
+            path (str): The path to the saved scorer.
+        """
+        return cls(np.load(path))
+
+    def save(self, path: str) -> None:
+        """
+        Saves the log-probabilities of all the quadgrams as a `.npy` array.
+
+        Args:
+            path (str): The path to save the scorer to.
+        """
+        with _atomic_open(path) as file:
+            np.save(file, self.log_probabilities)
+
+    def score(self, text: str) -> float:
+        """
+        Calculates the average log-probability of the quadgrams of the text.
+
+        Args:
+            text (str): The text to score.
+
+        Returns:
+            float: The average log-probability, texts shorter than four letters get the lowest one.
+        """
+        quadgrams = self.quadgram_indices(text)
+        if not len(quadgrams):
+            return float(self.log_probabilities.min())
+        return float(self.log_probabilities[quadgrams].mean())
+
+
+@lru_cache(maxsize=1)
+def default_scorer() -> WordScorer:
+    """
+    Returns the English words scorer shared by the whole process.
+    It is built from `nltk` once and cached on disk at `WORDS_CACHE` for later runs.
+    The cache is rebuilt if it cannot be read, is of another version or the corpus has changed since,
+    a stale cache is still used if the corpus is no longer available.
+
+    Returns:
+        WordScorer: The shared scorer.
+    """
+    cached = None
+    try:
+        cached = WordScorer.load(WORDS_CACHE)
+    except (OSError, EOFError, ValueError, KeyError, TypeError, pickle.UnpicklingError):
+        pass
+
+    if cached is not None and not cached.is_stale():
+        return cached
+
+    try:
+        scorer = WordScorer.from_nltk()
+    except LookupError:
+        if cached is None:
+            raise
+        return cached
+
+    # the cache only speeds up later runs, so failing to write it is not an error
+    try:
+        scorer.save(WORDS_CACHE)
+    except OSError:
+        pass
+
+    return scorer
@@ -0,0 +1,51 @@
+import heapq
+from typing import Callable, Hashable, Iterable, TypeVar
+
+from scoring import Scorer
+
+
+Key = TypeVar('Key', bound=Hashable)
+
+
+def top_candidates(
+        keys: Iterable[Key],
+        decrypt: Callable[[Key], str],
+        scorer: Scorer,
+        top_k: int = 5,
+        threshold: float | None = None
+    ) -> list[tuple[Key, float, str]]:
+    """
+    Decrypts the text with each key lazily, scores it right away and keeps only the `top_k` best
+    candidates on a heap, so no more than `top_k` decrypted texts are held in memory at once.
+    Candidates with equal scores are ranked in the order of their keys.
+
+    Args:
+        keys (Iterable[Key]): The keys to try.
+        decrypt (Callable[[Key], str]): The function decrypting the text with the given key.
+        scorer (Scorer): The scorer to rank the decrypted texts with.
+        top_k (int, optional): The number of best candidates to keep. Defaults to 5.
+        threshold (float, optional): Stop the search once a candidate scores at least this much. Defaults to None.
+
+    Returns:
+        list[tuple[Key, float, str]]: The (key, score, decrypted text) of the best candidates, best first.
+    """
+    heap = []
+
+    for order, key in enumerate(keys):
+        text = decrypt(key)
+        score = scorer.score(text)
+
+        # the order is unique, so keys and texts are never compared
+        candidate = (score, -order, key, text)
+        if len(heap) < top_k:
+            heapq.heappush(heap, candidate)
+        elif candidate > heap[0]:
+            heapq.heapreplace(heap, candidate)
+
+        if threshold is not None and score >= threshold:
+            break
+
+    return [
+        (key, score, text)
+        for score, _, key, text in sorted(heap, reverse=True)
+    ]
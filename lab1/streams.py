@@ -0,0 +1,108 @@
+import os
+from contextlib import nullcontext
+from typing import IO, ContextManager
+
+import numpy as np
+
+from engine import ALPHABET_SIZE, caesar_translate, codes_to_text, key_shifts, text_to_codes, vigenere_shift_codes
+
+
+# number of characters read, encrypted and written at once
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+Stream = str | os.PathLike | IO[str]
+
+
+def _open(file: Stream, mode: str) -> ContextManager[IO[str]]:
+    # paths are opened (and closed) here, open streams are left to the caller
+    if isinstance(file, (str, os.PathLike)):
+        return open(file, mode, encoding='utf-8', newline='')
+    return nullcontext(file)
+
+
+def ceaser_cipher_encrypt_stream(
+        src: Stream,
+        dst: Stream,
+        k: int,
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> None:
+    """
+    Encrypts a text file or stream chunk by chunk using the Caesar cipher algorithm.
+    The output is the same as the one of `ceaser_cipher_encrypt` on the whole text.
+
+    Args:
+        src (Stream): The path to or the text stream of the text to be encrypted.
+        dst (Stream): The path to or the text stream to write the encrypted text to.
+        k (int): The number of positions to shift each character.
+        chunk_size (int, optional): The number of characters to process at once. Defaults to 2**20.
+    """
+    with _open(src, 'r') as src, _open(dst, 'w') as dst:
+        while chunk := src.read(chunk_size):
+            dst.write(caesar_translate(chunk.lower(), k))
+
+
+def ceaser_cipher_decrypt_stream(
+        src: Stream,
+        dst: Stream,
+        k: int,
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> None:
+    """
+    Decrypts a text file or stream chunk by chunk using the Caesar cipher algorithm.
+
+    Args:
+        src (Stream): The path to or the text stream of the text to be decrypted.
+        dst (Stream): The path to or the text stream to write the decrypted text to.
+        k (int): The number of positions original text was shifted.
+        chunk_size (int, optional): The number of characters to process at once. Defaults to 2**20.
+    """
+    ceaser_cipher_encrypt_stream(src, dst, -k, chunk_size)
+
+
+def _vigenere_stream(src: Stream, dst: Stream, shifts: np.ndarray, chunk_size: int) -> None:
+    # the key position is carried over between chunks
+    offset = 0
+
+    with _open(src, 'r') as src, _open(dst, 'w') as dst:
+        while chunk := src.read(chunk_size):
+            codes = text_to_codes(chunk.lower())
+            offset = vigenere_shift_codes(codes, shifts, offset)
+            dst.write(codes_to_text(codes))
+
+
+def vigener_cipher_encrypt_stream(
+        src: Stream,
+        dst: Stream,
+        key: str,
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> None:
+    """
+    Encrypts a text file or stream chunk by chunk using the Vigenere cipher with the provided key.
+    The output is the same as the one of `vigener_cipher_encrypt` on the whole text.
+
+    Args:
+        src (Stream): The path to or the text stream of the text to be encrypted.
+        dst (Stream): The path to or the text stream to write the encrypted text to.
+        key (str): The key used for encryption.
+        chunk_size (int, optional): The number of characters to process at once. Defaults to 2**20.
+    """
+    _vigenere_stream(src, dst, key_shifts(key.lower()), chunk_size)
+
+
+def vigener_cipher_decrypt_stream(
+        src: Stream,
+        dst: Stream,
+        key: str,
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> None:
+    """
+    Decrypts a text file or stream chunk by chunk using the Vigenere cipher with the original key.
+    The output is the same as the one of `vigener_cipher_decrypt` on the whole text.
+
+    Args:
+        src (Stream): The path to or the text stream of the text to be decrypted.
+        dst (Stream): The path to or the text stream to write the decrypted text to.
+        key (str): The key originally used for encryption.
+        chunk_size (int, optional): The number of characters to process at once. Defaults to 2**20.
+    """
+    _vigenere_stream(src, dst, -key_shifts(key.lower()) % ALPHABET_SIZE, chunk_size)
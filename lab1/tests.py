@@ -1,4 +1,11 @@
+import io
+import os
+
 from main import *
+from scoring import QuadgramScorer, WordScorer
+from benchmark import compare
+from buffers import ceaser_cipher_decrypt_into, ceaser_cipher_encrypt_into, vigener_cipher_decrypt_into, vigener_cipher_encrypt_into
+from streams import ceaser_cipher_encrypt_stream, vigener_cipher_decrypt_stream, vigener_cipher_encrypt_stream
 
 
 def test_ceaser_cipher_shift_3():
@@ -52,4 +59,216 @@ def test_vigener_cipher_key_z():
     decrypted = vigener_cipher_decrypt(encrypted, key)
     assert decrypted == text
     universal_decrypted = vigener_cipher_universal_decrypt(encrypted, len(key))
-    assert universal_decrypted == text
\ No newline at end of file
+    assert universal_decrypted == text
+
+def test_vigener_cipher_key_lemon():
+    text = "Attack at dawn!"
+    key = "LEMON"
+    encrypted = vigener_cipher_encrypt(text, key)
+    assert encrypted == "lxfopv ef rnhr!"
+    decrypted = vigener_cipher_decrypt(encrypted, key)
+    assert decrypted == text.lower()
+
+
+def test_cipher_non_ascii_text():
+    text = "zażółć gęślą jaźń"
+    assert ceaser_cipher_encrypt(text, 1) == "abżółć hęśmą kbźń"
+    assert ceaser_cipher_decrypt(ceaser_cipher_encrypt(text, 1), 1) == text
+    assert vigener_cipher_decrypt(vigener_cipher_encrypt(text, "key"), "key") == text
+
+
+LONG_TEXT = '''
+    It was the best of times, it was the worst of times, it was the age of wisdom,
+    it was the age of foolishness, it was the epoch of belief, it was the epoch of
+    incredulity, it was the season of light, it was the season of darkness, it was
+    the spring of hope, it was the winter of despair, we had everything before us,
+    we had nothing before us, we were all going direct to heaven, we were all going
+    direct the other way.
+'''.lower()
+
+
+def test_likely_keys_long_key():
+    key = "cryptography"
+    encrypted = vigener_cipher_encrypt(LONG_TEXT, key)
+    assert next(likely_keys(encrypted, len(key))) == key
+
+
+def test_vigener_cipher_universal_decrypt_long_key():
+    key = "cryptography"
+    encrypted = vigener_cipher_encrypt(LONG_TEXT, key)
+    assert vigener_cipher_universal_decrypt(encrypted, len(key)) == LONG_TEXT
+
+
+def test_estimate_key_lengths():
+    for key in ["lemon", "xyz", "secretkey"]:
+        encrypted = vigener_cipher_encrypt(LONG_TEXT, key)
+        assert estimate_key_lengths(encrypted)[0] == len(key)
+
+
+def test_vigener_cipher_auto_decrypt():
+    encrypted = vigener_cipher_encrypt(LONG_TEXT, "cryptography")
+    assert vigener_cipher_auto_decrypt(encrypted) == LONG_TEXT
+
+
+def test_word_scorer_save_load(tmp_path):
+    scorer = WordScorer(["hello", "world"])
+    assert scorer.score("hello there world") == 2 / 3
+    path = str(tmp_path / "words.pickle")
+    scorer.save(path)
+    assert WordScorer.load(path).words == scorer.words
+
+
+def test_default_scorer_rebuilds_truncated_cache(tmp_path, monkeypatch):
+    import scoring
+    path = str(tmp_path / "words.pickle")
+    WordScorer(["hello", "world"]).save(path)
+    with open(path, "r+b") as file:
+        file.truncate(10)
+    monkeypatch.setattr(scoring, "WORDS_CACHE", path)
+    monkeypatch.setattr(WordScorer, "from_nltk", classmethod(lambda cls: cls(["hello"])))
+    scoring.default_scorer.cache_clear()
+    try:
+        assert scoring.default_scorer().words == {"hello"}
+        assert WordScorer.load(path).words == {"hello"}
+        assert os.listdir(tmp_path) == ["words.pickle"]
+    finally:
+        scoring.default_scorer.cache_clear()
+
+def test_default_scorer_rebuilds_stale_cache(tmp_path, monkeypatch):
+    import pickle
+    import scoring
+    corpus = tmp_path / "corpus"
+    corpus.write_text("hello")
+    path = str(tmp_path / "words.pickle")
+    WordScorer(["hello"], scoring._fingerprint(str(corpus))).save(path)
+    monkeypatch.setattr(scoring, "WORDS_CACHE", path)
+    monkeypatch.setattr(WordScorer, "from_nltk", classmethod(lambda cls: cls(["hello", "world"])))
+    scoring.default_scorer.cache_clear()
+    try:
+        assert scoring.default_scorer().words == {"hello"}
+
+        # the corpus has changed since the cache was built
+        os.utime(corpus, ns=(0, 0))
+        scoring.default_scorer.cache_clear()
+        assert scoring.default_scorer().words == {"hello", "world"}
+
+        # a cache of another version of the format
+        with open(path, "wb") as file:
+            pickle.dump({"version": 0, "source": None, "words": frozenset(["old"])}, file)
+        scoring.default_scorer.cache_clear()
+        assert scoring.default_scorer().words == {"hello", "world"}
+    finally:
+        scoring.default_scorer.cache_clear()
+
+def test_quadgram_scorer_without_spaces(tmp_path):
+    scorer = QuadgramScorer.from_text(LONG_TEXT)
+    path = str(tmp_path / "quadgrams.npy")
+    scorer.save(path)
+    scorer = QuadgramScorer.load(path)
+    text = "itwastheseasonoflight"
+    assert scorer.score(text) > scorer.score(ceaser_cipher_encrypt(text, 7))
+    assert ceaser_cipher_universal_decrypt(ceaser_cipher_encrypt(text, 7), scorer) == text
+
+
+def test_ceaser_cipher_candidates():
+    scorer = WordScorer(["hello", "world"])
+    candidates = ceaser_cipher_candidates("khoor zruog", top_k=3, scorer=scorer)
+    assert len(candidates) == 3
+    assert candidates[0] == (3, 1.0, "hello world")
+    assert candidates[1][1] <= 1.0
+
+
+def test_vigener_cipher_candidates_threshold():
+    scorer = WordScorer(["hello", "world"])
+    encrypted = vigener_cipher_encrypt("hello world", "ab")
+    candidates = vigener_cipher_candidates(encrypted, 2, exhaustive=True, threshold=1.0, scorer=scorer)
+    assert candidates[0] == ("ab", 1.0, "hello world")
+
+
+def test_vigener_cipher_candidates_parallel():
+    scorer = QuadgramScorer.from_text(LONG_TEXT)
+    encrypted = vigener_cipher_encrypt(LONG_TEXT[:200], "key")
+    sequential = vigener_cipher_candidates(encrypted, 3, exhaustive=True, scorer=scorer)
+    parallel = vigener_cipher_candidates(encrypted, 3, exhaustive=True, scorer=scorer, workers=2)
+    assert parallel == sequential
+    assert parallel[0][0] == "key"
+
+
+def test_vigener_cipher_stream(tmp_path):
+    src, encrypted, decrypted = tmp_path / "src.txt", tmp_path / "encrypted.txt", tmp_path / "decrypted.txt"
+    src.write_text(LONG_TEXT, encoding="utf-8")
+
+    vigener_cipher_encrypt_stream(src, encrypted, "lemon", chunk_size=7)
+    assert encrypted.read_text(encoding="utf-8") == vigener_cipher_encrypt(LONG_TEXT, "lemon")
+
+    vigener_cipher_decrypt_stream(encrypted, decrypted, "lemon", chunk_size=11)
+    assert decrypted.read_text(encoding="utf-8") == LONG_TEXT
+
+
+def test_ceaser_cipher_stream():
+    src, dst = io.StringIO("Hello World\r\n" * 10), io.StringIO()
+    ceaser_cipher_encrypt_stream(src, dst, 3, chunk_size=5)
+    assert dst.getvalue() == ceaser_cipher_encrypt("Hello World\r\n" * 10, 3)
+
+
+def test_vigener_cipher_batch():
+    texts = ["Hello World", "", "attack at dawn", "zażółć gęślą jaźń", "..."]
+    keys = ["ddd", "a", "lemon", "key", "xyz"]
+    encrypted = vigener_cipher_encrypt_batch(texts, keys)
+    assert encrypted == [vigener_cipher_encrypt(text, key) for text, key in zip(texts, keys)]
+    assert vigener_cipher_decrypt_batch(encrypted, keys) == [text.lower() for text in texts]
+
+
+def test_ceaser_cipher_batch():
+    texts = ["Hello World", "", "attack at dawn"]
+    shifts = [3, 5, -27]
+    encrypted = ceaser_cipher_encrypt_batch(texts, shifts)
+    assert encrypted == [ceaser_cipher_encrypt(text, k) for text, k in zip(texts, shifts)]
+    assert ceaser_cipher_decrypt_batch(encrypted, shifts) == [text.lower() for text in texts]
+
+
+def test_benchmark_compare():
+    baseline = [{"name": "f", "size": 1000, "key_len": 2, "median_s": 1.0}]
+    faster = [{"name": "f", "size": 1000, "key_len": 2, "median_s": 1.1}]
+    slower = [{"name": "f", "size": 1000, "key_len": 2, "median_s": 1.5}]
+    assert compare(faster, baseline, threshold=0.2) == []
+    assert compare(slower, baseline, threshold=0.2)[0]["name"] == "f"
+
+
+def test_benchmark_compare_zero_baseline():
+    baseline = [{"name": "f", "size": 1000, "key_len": None, "median_s": 0.0}]
+    assert compare([{"name": "f", "size": 1000, "key_len": None, "median_s": 0.0}], baseline, threshold=0.2) == []
+    regressions = compare([{"name": "f", "size": 1000, "key_len": None, "median_s": 1e-6}], baseline, threshold=0.2)
+    assert regressions[0]["slowdown"] == float("inf")
+
+
+def test_ceaser_cipher_into():
+    data = bytearray(b"Hello World!")
+    ceaser_cipher_encrypt_into(data, 3)
+    assert data == b"Khoor Zruog!"
+
+    out = bytearray(len(data))
+    ceaser_cipher_decrypt_into(bytes(data), 3, out=out, lowercase=True)
+    assert out == b"hello world!"
+
+
+def test_vigener_cipher_into():
+    text = "Attack at dawn! " * 5
+    data = bytearray(text.encode())
+
+    # encrypt in two parts, carrying the key position over
+    offset = vigener_cipher_encrypt_into(memoryview(data)[:21], "lemon", lowercase=True)
+    vigener_cipher_encrypt_into(memoryview(data)[21:], "lemon", lowercase=True, offset=offset)
+    assert data.decode() == vigener_cipher_encrypt(text, "lemon")
+
+    out = bytearray(len(data))
+    vigener_cipher_decrypt_into(data, "lemon", out=out)
+    assert out.decode() == text.lower()
+
+
+def test_vigener_cipher_into_across_chunks():
+    import buffers
+    text = LONG_TEXT * (2 * buffers.TRANSLATE_CHUNK_SIZE // len(LONG_TEXT) + 1)
+    data = bytearray(text.encode())
+    vigener_cipher_encrypt_into(data, "cryptography", lowercase=True)
+    assert data.decode() == vigener_cipher_encrypt(text, "cryptography")
@@ -0,0 +1,312 @@
+import os
+import csv
+import sys
+import json
+import math
+import time
+import hashlib
+import argparse
+import statistics
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+
+DEFAULT_ALGORITHMS = ['md5', 'sha1', 'sha256', 'sha512', 'blake2b', 'sha3_256']
+DEFAULT_SIZES = [2**i for i in range(10, 27, 2)]
+
+DEFAULT_WORKER_COUNTS = sorted({1, 2, 4, 8, os.cpu_count() or 1})
+SCALING_SIZE = 16 << 20
+
+# every timed sample hashes the buffer as many times as needed to take at least this long
+MIN_SAMPLE_NS = 1_000_000
+
+
+def build_buffers(sizes: list[int]) -> dict[int, bytes]:
+    """
+    Builds the input buffers ahead of time, so their allocation is not measured.
+
+    Args:
+        sizes (list[int]): The sizes of the buffers in bytes.
+
+    Returns:
+        dict[int, bytes]: Random bytes of each size.
+    """
+    return {size: os.urandom(size) for size in sizes}
+
+
+def _finalize(hasher) -> bytes:
+    try:
+        return hasher.digest()
+    except TypeError:   # some hash functions require a length argument
+        return hasher.digest(20)
+
+
+def measure(
+        algorithm: str,
+        data: bytes,
+        repeat: int = 20,
+        warmup: int = 3,
+        min_sample_ns: int = MIN_SAMPLE_NS
+    ) -> list[float]:
+    """
+    Measures the time of hashing the data (including the digest) with `perf_counter_ns`.
+    The number of hashes per sample is calibrated first, then the warmup samples are discarded.
+
+    Args:
+        algorithm (str): The hashing algorithm.
+        data (bytes): The data to hash.
+        repeat (int, optional): The number of timed samples. Defaults to 20.
+        warmup (int, optional): The number of discarded samples. Defaults to 3.
+        min_sample_ns (int, optional): The minimal duration of a sample. Defaults to 1 ms.
+
+    Returns:
+        list[float]: The time of a single hash in nanoseconds, one per sample.
+    """
+    def sample(number: int) -> int:
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            _finalize(hashlib.new(algorithm, data))
+        return time.perf_counter_ns() - start
+
+    number = 1
+    while sample(number) < min_sample_ns:
+        number *= 2
+
+    for _ in range(warmup):
+        sample(number)
+
+    return [sample(number) / number for _ in range(repeat)]
+
+
+def summarize(samples: list[float], size: int) -> dict[str, float]:
+    """
+    Summarizes the samples of `measure`.
+
+    Args:
+        samples (list[float]): The time of a single hash in nanoseconds.
+        size (int): The size of the hashed data in bytes.
+
+    Returns:
+        dict[str, float]: The median and 95th percentile time in nanoseconds and the median throughput in MB/s.
+    """
+    median = statistics.median(samples)
+    p95 = sorted(samples)[math.ceil(0.95 * len(samples)) - 1]
+
+    return {
+        'median_ns': median,
+        'p95_ns': p95,
+        'mb_per_s': size / median * 1e3,
+    }
+
+
+def run_benchmark(
+        algorithms: list[str] = DEFAULT_ALGORITHMS,
+        sizes: list[int] = DEFAULT_SIZES,
+        repeat: int = 20,
+        warmup: int = 3
+    ) -> list[dict]:
+    """
+    Benchmarks each algorithm on buffers of each size.
+
+    Args:
+        algorithms (list[str], optional): The hashing algorithms. Defaults to DEFAULT_ALGORITHMS.
+        sizes (list[int], optional): The sizes of the hashed buffers in bytes. Defaults to DEFAULT_SIZES.
+        repeat (int, optional): The number of timed samples. Defaults to 20.
+        warmup (int, optional): The number of discarded samples. Defaults to 3.
+
+    Returns:
+        list[dict]: One result per algorithm and size.
+    """
+    buffers = build_buffers(sizes)
+
+    results = []
+    for algorithm in algorithms:
+        for size, data in buffers.items():
+            samples = measure(algorithm, data, repeat, warmup)
+            results.append({'algorithm': algorithm, 'size': size, **summarize(samples, size)})
+
+            print(
+                f"{algorithm:<12} {size:>10} B  median={results[-1]['median_ns']:>14.0f} ns  "
+                f"p95={results[-1]['p95_ns']:>14.0f} ns  {results[-1]['mb_per_s']:>9.1f} MB/s",
+                file=sys.stderr
+            )
+
+    return results
+
+
+# buffer of a worker process of the scaling benchmark, built once by `_init_process`
+_buffer = b''
+
+
+def _init_process(size: int) -> None:
+    global _buffer
+    _buffer = os.urandom(size)
+
+
+def _hash_repeatedly(algorithm: str, number: int, data: bytes | None = None) -> None:
+    data = _buffer if data is None else data
+    for _ in range(number):
+        _finalize(hashlib.new(algorithm, data))
+
+
+def _aggregate_throughput(
+        executor: Executor,
+        algorithm: str,
+        workers: int,
+        number: int,
+        size: int,
+        data: bytes | None
+    ) -> float:
+    # every worker hashes its buffer `number` times, the throughput is taken over the wall time
+    start = time.perf_counter_ns()
+    futures = [executor.submit(_hash_repeatedly, algorithm, number, data) for _ in range(workers)]
+    for future in futures:
+        future.result()
+    elapsed = time.perf_counter_ns() - start
+
+    return workers * number * size / elapsed * 1e3
+
+
+def run_scaling(
+        algorithms: list[str] | None = None,
+        worker_counts: list[int] = DEFAULT_WORKER_COUNTS,
+        modes: list[str] = ['thread', 'process'],
+        size: int = SCALING_SIZE,
+        number: int = 4,
+        repeat: int = 3
+    ) -> list[dict]:
+    """
+    Measures the aggregate throughput of N concurrent hashers (threads or processes) for each N.
+    The buffers are built before timing and the pools are started (and warmed up) beforehand.
+
+    Threads stop scaling where an algorithm holds the GIL, processes where the cores
+    or the memory bandwidth run out. Comparing the two tells the limits apart.
+
+    Args:
+        algorithms (list[str], optional): The hashing algorithms. Defaults to all of `hashlib.algorithms_available`.
+        worker_counts (list[int], optional): The numbers of concurrent hashers, a single one is always measured as the baseline. Defaults to DEFAULT_WORKER_COUNTS.
+        modes (list[str], optional): 'thread' and/or 'process'. Defaults to both.
+        size (int, optional): The size of the hashed buffer in bytes. Defaults to 16 MiB.
+        number (int, optional): The number of times each hasher hashes the buffer per sample. Defaults to 4.
+        repeat (int, optional): The number of timed samples, the median is reported. Defaults to 3.
+
+    Returns:
+        list[dict]: One result per algorithm, mode and number of workers, with the aggregate throughput in MB/s,
+            the speedup over a single worker and the parallel efficiency (speedup per worker).
+    """
+    algorithms = algorithms or sorted(hashlib.algorithms_available)
+    # the speedups are relative to a single worker, so it is measured first
+    worker_counts = sorted(set(worker_counts) | {1})
+    data = os.urandom(size)
+
+    results = []
+    for algorithm in algorithms:
+        try:
+            hashlib.new(algorithm)
+        except ValueError:  # listed, but not provided by the linked OpenSSL
+            continue
+
+        for mode in modes:
+            single = None
+
+            for workers in worker_counts:
+                if mode == 'thread':
+                    executor = ThreadPoolExecutor(workers)
+                    shared = data
+                else:
+                    executor = ProcessPoolExecutor(workers, initializer=_init_process, initargs=(size,))
+                    shared = None
+
+                with executor:
+                    _aggregate_throughput(executor, algorithm, workers, 1, size, shared)
+                    throughput = statistics.median(
+                        _aggregate_throughput(executor, algorithm, workers, number, size, shared)
+                        for _ in range(repeat)
+                    )
+
+                if workers == 1:
+                    single = throughput
+                results.append({
+                    'algorithm': algorithm,
+                    'mode': mode,
+                    'workers': workers,
+                    'mb_per_s': throughput,
+                    'speedup': throughput / single,
+                    'efficiency': throughput / single / workers,
+                })
+
+                print(
+                    f"{algorithm:<12} {mode:<8} workers={workers:<3} {throughput:>9.1f} MB/s  "
+                    f"speedup={results[-1]['speedup']:>5.2f}  efficiency={results[-1]['efficiency']:>4.0%}",
+                    file=sys.stderr
+                )
+
+    return results
+
+
+def write_json(results: list[dict], path: str) -> None:
+    with open(path, 'w') as file:
+        json.dump(results, file, indent=2)
+
+
+def write_csv(results: list[dict], path: str) -> None:
+    with open(path, 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=list(results[0]))
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def plot(results: list[dict]) -> None:
+    """
+    Plots the median time of hashing against the size for each algorithm (requires `plotly`).
+
+    Args:
+        results (list[dict]): The results of `run_benchmark`.
+    """
+    import plotly.graph_objs as go
+
+    algorithms = dict.fromkeys(result['algorithm'] for result in results)
+    data = [
+        go.Scatter(
+            x=[result['size'] for result in results if result['algorithm'] == algorithm],
+            y=[result['median_ns'] / 1e9 for result in results if result['algorithm'] == algorithm],
+            mode='lines+markers',
+            name=algorithm
+        )
+        for algorithm in algorithms
+    ]
+
+    layout = go.Layout(
+        title='Time of hashing a message of given size for each algorithm',
+        xaxis=dict(title='Message size (bytes)'),
+        yaxis=dict(title='Time (s)'),
+        legend=dict(orientation='h')
+    )
+
+    go.Figure(data=data, layout=layout).show()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark hashing algorithms.')
+    parser.add_argument('-a', '--algorithms', nargs='+', help='all available ones with --scaling by default')
+    parser.add_argument('-s', '--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='buffer sizes in bytes')
+    parser.add_argument('--repeat', type=int, default=20, help='number of timed samples')
+    parser.add_argument('--warmup', type=int, default=3, help='number of discarded samples')
+    parser.add_argument('--scaling', action='store_true', help='measure throughput against the number of concurrent hashers')
+    parser.add_argument('-w', '--workers', type=int, nargs='+', default=DEFAULT_WORKER_COUNTS, help='numbers of concurrent hashers (with --scaling)')
+    parser.add_argument('--modes', nargs='+', choices=['thread', 'process'], default=['thread', 'process'], help='kinds of concurrent hashers (with --scaling)')
+    parser.add_argument('--json', help='write the results as JSON')
+    parser.add_argument('--csv', help='write the results as CSV')
+    parser.add_argument('--plot', action='store_true', help='show the results with plotly')
+    args = parser.parse_args()
+
+    if args.scaling:
+        results = run_scaling(args.algorithms, args.workers, args.modes)
+    else:
+        results = run_benchmark(args.algorithms or DEFAULT_ALGORITHMS, args.sizes, args.repeat, args.warmup)
+
+    if args.json:
+        write_json(results, args.json)
+    if args.csv:
+        write_csv(results, args.csv)
+    if args.plot and not args.scaling:
+        plot(results)
@@ -0,0 +1,281 @@
+import os
+import sys
+import sqlite3
+import argparse
+from typing import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from main import DEFAULT_CHUNK_SIZE, hash_file
+
+
+# where the digests are stored between runs
+HASH_CACHE = os.getenv(
+    'HASH_CACHE',
+    os.path.join(os.path.expanduser('~'), '.cache', 'krypto-labs', 'hashes.sqlite3')
+)
+
+# number of files looked up in a single query (sqlite limits the number of query parameters)
+LOOKUP_BATCH_SIZE = 250
+# number of new digests stored in a single transaction, so an interrupted run keeps most of its work
+STORE_BATCH_SIZE = 1000
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS hashes (
+    device INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    algorithm TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    PRIMARY KEY (device, inode, algorithm)
+)
+'''
+
+_UPSERT = '''
+INSERT INTO hashes (device, inode, algorithm, size, mtime_ns, path, digest)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (device, inode, algorithm) DO UPDATE SET
+    size = excluded.size,
+    mtime_ns = excluded.mtime_ns,
+    path = excluded.path,
+    digest = excluded.digest
+'''
+
+
+class HashCache:
+    """
+    Persistent cache of file digests kept in a local SQLite database.
+    A file is identified by its device and inode, its digest is reused
+    as long as its size and modification time have not changed.
+
+    Attributes:
+        hits (int): The number of digests served from the cache.
+        misses (int): The number of files that had to be hashed.
+    """
+    def __init__(self, path: str = HASH_CACHE):
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(_SCHEMA)
+        self.connection.commit()
+
+        self.hits = 0
+        self.misses = 0
+
+    def __enter__(self) -> 'HashCache':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def lookup(self, files: Iterable[tuple[os.stat_result, str]]) -> list[str | None]:
+        """
+        Looks up the stored digests of many files at once.
+
+        Args:
+            files (Iterable[tuple[os.stat_result, str]]): The stat result of each file and the hashing algorithm.
+
+        Returns:
+            list[str | None]: The stored digest of each file, None if it is not stored or the file has changed since.
+        """
+        files = list(files)
+        found = {}
+
+        for start in range(0, len(files), LOOKUP_BATCH_SIZE):
+            batch = files[start:start + LOOKUP_BATCH_SIZE]
+            rows = ', '.join(['(?, ?, ?)'] * len(batch))
+            parameters = [value for stat, algorithm in batch for value in (stat.st_dev, stat.st_ino, algorithm)]
+
+            found.update(
+                ((device, inode, algorithm), (size, mtime_ns, digest))
+                for device, inode, algorithm, size, mtime_ns, digest in self.connection.execute(
+                    'SELECT device, inode, algorithm, size, mtime_ns, digest FROM hashes '
+                    f'WHERE (device, inode, algorithm) IN (VALUES {rows})',
+                    parameters
+                )
+            )
+
+        digests = []
+        for stat, algorithm in files:
+            size, mtime_ns, digest = found.get((stat.st_dev, stat.st_ino, algorithm), (None, None, None))
+            unchanged = size == stat.st_size and mtime_ns == stat.st_mtime_ns
+            digests.append(digest if unchanged else None)
+
+        return digests
+
+    def store(self, entries: Iterable[tuple[str, os.stat_result, str, str]]) -> None:
+        """
+        Stores (or replaces) the digests of many files in a single transaction.
+
+        Args:
+            entries (Iterable[tuple[str, os.stat_result, str, str]]): The path, stat result, hashing algorithm and digest of each file.
+        """
+        with self.connection:
+            self.connection.executemany(_UPSERT, (
+                (stat.st_dev, stat.st_ino, algorithm, stat.st_size, stat.st_mtime_ns, os.path.abspath(path), digest)
+                for path, stat, algorithm, digest in entries
+            ))
+
+    def hash_files(
+            self,
+            paths: Iterable[str],
+            algorithm: str = 'sha256',
+            force: bool = False,
+            workers: int = 4,
+            chunk_size: int = DEFAULT_CHUNK_SIZE,
+            on_error: Callable[[str, OSError], object] | None = None
+        ) -> dict[str, str]:
+        """
+        Calculates the hash values of many files, hashing only those that are not cached or have changed.
+        The cache is queried in bulk, the missing files are hashed on a thread pool
+        and their digests are stored in batches as they are ready.
+
+        Args:
+            paths (Iterable[str]): The paths to the files.
+            algorithm (str, optional): The hashing algorithm to use. Defaults to 'sha256'.
+            force (bool, optional): Whether to hash all the files again, ignoring the cache. Defaults to False.
+            workers (int, optional): The number of threads hashing the files. Defaults to 4.
+            chunk_size (int, optional): The number of bytes hashed at once. Defaults to 1 MiB.
+            on_error (Callable[[str, OSError], object], optional): Called with the path and the error of each file
+                that cannot be read, which is then left out of the result. Defaults to None (raise).
+
+        Returns:
+            dict[str, str]: The hash value of each file.
+
+        Raises:
+            OSError: If any of the files cannot be read (e.g. `FileNotFoundError`) and `on_error` is not given,
+                once the other files are hashed and stored.
+        """
+        errors = []
+
+        def fail(path: str, error: OSError) -> None:
+            if on_error is None:
+                errors.append(error)
+            else:
+                on_error(path, error)
+
+        paths = list(paths)
+        stats = {}
+        for path in paths:
+            try:
+                stats[path] = os.stat(path)
+            except OSError as error:
+                fail(path, error)
+
+        if force:
+            cached = [None] * len(stats)
+        else:
+            cached = self.lookup((stat, algorithm) for stat in stats.values())
+
+        digests = {path: digest for path, digest in zip(stats, cached) if digest is not None}
+        missing = [path for path in stats if path not in digests]
+        self.hits += len(digests)
+        self.misses += len(missing)
+
+        batch = []
+        with ThreadPoolExecutor(workers) as executor:
+            futures = {executor.submit(hash_file, path, algorithm, chunk_size): path for path in missing}
+            try:
+                for future in as_completed(futures):
+                    path = futures[future]
+                    try:
+                        digests[path] = future.result()
+                    except OSError as error:
+                        fail(path, error)
+                        continue
+
+                    batch.append((path, stats[path], algorithm, digests[path]))
+                    if len(batch) >= STORE_BATCH_SIZE:
+                        self.store(batch)
+                        batch = []
+            finally:
+                # keep what is hashed so far, even if the run is interrupted
+                for future in futures:
+                    future.cancel()
+                self.store(batch)
+
+        if errors:
+            raise errors[0]
+
+        return {path: digests[path] for path in paths if path in digests}
+
+    def hash_file(self, path: str, algorithm: str = 'sha256', force: bool = False) -> str:
+        """
+        Calculates the hash value of a file, reusing the cached one if the file has not changed.
+
+        Args:
+            path (str): The path to the file.
+            algorithm (str, optional): The hashing algorithm to use. Defaults to 'sha256'.
+            force (bool, optional): Whether to hash the file again, ignoring the cache. Defaults to False.
+
+        Returns:
+            str: The hash value of the file.
+        """
+        return self.hash_files([path], algorithm, force, workers=1)[path]
+
+    def purge(self) -> int:
+        """
+        Removes the entries of files that no longer exist or have changed since they were hashed.
+
+        Returns:
+            int: The number of removed entries.
+        """
+        stale = []
+        for device, inode, algorithm, size, mtime_ns, path in self.connection.execute(
+            'SELECT device, inode, algorithm, size, mtime_ns, path FROM hashes'
+        ):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                stale.append((device, inode, algorithm))
+                continue
+
+            if (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns) != (device, inode, size, mtime_ns):
+                stale.append((device, inode, algorithm))
+
+        with self.connection:
+            self.connection.executemany(
+                'DELETE FROM hashes WHERE device = ? AND inode = ? AND algorithm = ?',
+                stale
+            )
+
+        return len(stale)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Hash files, reusing the digests of unchanged files.')
+    parser.add_argument('--cache', default=HASH_CACHE, help='path to the cache database')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    hash_parser = subparsers.add_parser('hash', help='hash the given files')
+    hash_parser.add_argument('paths', nargs='+')
+    hash_parser.add_argument('-a', '--algorithm', default='sha256')
+    hash_parser.add_argument('-j', '--workers', type=int, default=4)
+    hash_parser.add_argument('--force', action='store_true', help='hash all the files again')
+
+    subparsers.add_parser('purge', help='remove entries of deleted or changed files')
+
+    args = parser.parse_args()
+
+    with HashCache(args.cache) as cache:
+        if args.command == 'hash':
+            errors = []
+
+            def report(path: str, error: OSError) -> None:
+                print(f'{path}: {error.strerror or error}', file=sys.stderr)
+                errors.append(path)
+
+            digests = cache.hash_files(args.paths, args.algorithm, args.force, args.workers, on_error=report)
+            for path, digest in digests.items():
+                print(f'{digest}  {path}')
+            print(f'hits: {cache.hits}, misses: {cache.misses}', file=sys.stderr)
+
+            if errors:
+                sys.exit(1)
+        else:
+            print(f'purged: {cache.purge()}')
@@ -0,0 +1,165 @@
+import os
+import sys
+import json
+import hashlib
+import argparse
+from collections import defaultdict
+from typing import Callable, Hashable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+
+from main import hash_file
+from manifest import _report_error, walk_files
+
+
+# number of bytes hashed at each end of a file before hashing it in full
+PARTIAL_SIZE = 64 << 10
+
+
+def _partial_hash(path: str, size: int, partial_size: int) -> bytes:
+    hasher = hashlib.blake2b()
+    with open(path, 'rb', buffering=0) as file:
+        hasher.update(file.read(partial_size))
+        if size > partial_size:
+            file.seek(max(partial_size, size - partial_size))
+            hasher.update(file.read(partial_size))
+
+    return hasher.digest()
+
+
+def _regroup(
+        groups: Iterable[list[str]],
+        key: Callable[[str], Hashable],
+        workers: int,
+        on_error: Callable[[str, OSError], object]
+    ) -> list[list[str]]:
+    # splits every group by the key computed in parallel, only keeping the groups that still collide
+    groups = list(groups)
+    paths = [path for group in groups for path in group]
+
+    def safe_key(path: str) -> Hashable | OSError:
+        # a file that cannot be read (or is gone since the walk) is dropped from its group, not the whole scan
+        try:
+            return key(path)
+        except OSError as error:
+            return error
+
+    with ThreadPoolExecutor(workers) as executor:
+        keys = dict(zip(paths, executor.map(safe_key, paths)))
+
+    result = []
+    for group in groups:
+        split = defaultdict(list)
+        for path in group:
+            if isinstance(keys[path], OSError):
+                on_error(path, keys[path])
+                continue
+            split[keys[path]].append(path)
+        result.extend(paths for paths in split.values() if len(paths) > 1)
+
+    return result
+
+
+def find_duplicates(
+        roots: Iterable[str],
+        algorithm: str = 'sha256',
+        partial_size: int = PARTIAL_SIZE,
+        workers: int = 8,
+        min_size: int = 1,
+        on_error: Callable[[str, OSError], object] = _report_error
+    ) -> list[tuple[int, list[str]]]:
+    """
+    Finds the files with the same content in the directory trees, reading as little as possible:
+    the files are grouped by size, then by a hash of their first and last `partial_size` bytes,
+    and only the files that still collide are hashed in full (in parallel).
+    Hard links to the same file are counted once. Files that cannot be read are reported to `on_error` and left out.
+
+    Args:
+        roots (Iterable[str]): The root directories.
+        algorithm (str, optional): The hashing algorithm used for the full hashes. Defaults to 'sha256'.
+        partial_size (int, optional): The number of bytes hashed at each end of a file. Defaults to 64 KiB.
+        workers (int, optional): The number of threads reading the files. Defaults to 8.
+        min_size (int, optional): The size of the smallest file considered. Defaults to 1 byte.
+        on_error (Callable[[str, OSError], object], optional): Called with the path and the error of each skipped file. Defaults to printing it to standard error.
+
+    Returns:
+        list[tuple[int, list[str]]]: The size and the paths of each group of duplicates, largest files first.
+    """
+    # 1. size
+    by_size = defaultdict(list)
+    for root in roots:
+        for path, size in walk_files(root, lambda path, error: on_error(os.path.join(root, path), error)):
+            if size >= min_size:
+                by_size[size].append(os.path.join(root, path))
+
+    sizes = {}
+    groups = []
+    for size, paths in by_size.items():
+        if len(paths) < 2:
+            continue
+
+        # hard links share the content and the space, only one of them is kept
+        inodes = {}
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError as error:
+                on_error(path, error)
+                continue
+            inodes.setdefault((stat.st_dev, stat.st_ino), path)
+
+        if len(inodes) > 1:
+            groups.append(list(inodes.values()))
+            sizes.update(dict.fromkeys(inodes.values(), size))
+
+    # 2. both ends of the file
+    groups = _regroup(groups, lambda path: _partial_hash(path, sizes[path], partial_size), workers, on_error)
+
+    # 3. the whole file, unless the partial hash has covered it already
+    small = [group for group in groups if sizes[group[0]] <= 2 * partial_size]
+    large = [group for group in groups if sizes[group[0]] > 2 * partial_size]
+    groups = small + _regroup(large, lambda path: hash_file(path, algorithm), workers, on_error)
+
+    return sorted(((sizes[group[0]], sorted(group)) for group in groups), key=lambda group: (-group[0], group[1]))
+
+
+def reclaimable_bytes(groups: Iterable[tuple[int, list[str]]]) -> int:
+    """
+    Calculates the number of bytes freed by keeping a single file of each group of duplicates.
+
+    Args:
+        groups (Iterable[tuple[int, list[str]]]): The groups returned by `find_duplicates`.
+
+    Returns:
+        int: The number of bytes.
+    """
+    return sum(size * (len(paths) - 1) for size, paths in groups)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Find duplicate files in directory trees.')
+    parser.add_argument('roots', nargs='+')
+    parser.add_argument('-a', '--algorithm', default='sha256')
+    parser.add_argument('-j', '--workers', type=int, default=8)
+    parser.add_argument('--partial-size', type=int, default=PARTIAL_SIZE, help='bytes hashed at each end of a file first')
+    parser.add_argument('--min-size', type=int, default=1, help='skip smaller files')
+    parser.add_argument('--json', action='store_true', help='print the groups as JSON lines')
+    args = parser.parse_args()
+
+    errors = []
+
+    def report(path: str, error: OSError) -> None:
+        _report_error(path, error)
+        errors.append(path)
+
+    groups = find_duplicates(args.roots, args.algorithm, args.partial_size, args.workers, args.min_size, report)
+
+    for size, paths in groups:
+        if args.json:
+            print(json.dumps({'size': size, 'paths': paths}))
+        else:
+            print(f'{size} bytes x {len(paths)}')
+            for path in paths:
+                print(f'  {path}')
+
+    print(f'{len(groups)} groups, {reclaimable_bytes(groups)} bytes reclaimable', file=sys.stderr)
+    sys.exit(1 if errors else 0)
@@ -1,10 +1,18 @@
-import time
-import timeit
+import os
+import mmap
 import hashlib
+import itertools
+from typing import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
 
 from tqdm import tqdm
 from tabulate import tabulate
-import plotly.graph_objs as go
+
+import benchmark
+
+
+# number of bytes read from a file at once
+DEFAULT_CHUNK_SIZE = 1 << 20
 
 
 def test_all_algorithms(text: str) -> None:
@@ -16,17 +24,11 @@ def test_all_algorithms(text: str) -> None:
         text (str): The input text to be hashed.
     """
     def time_hashing(algorithm: str, bytes_: bytes) -> tuple[float, str]:
-        # time the hashing of the bytes
-        start = time.time()
-        hasher = hashlib.new(algorithm, bytes_)
-        hashing_time = time.time() - start
-        
-        try:
-            hasher = hasher.hexdigest()
-        except TypeError:   # some hash functions require a length argument
-            hasher = hasher.hexdigest(length=20)
-        
-        return hashing_time, hasher
+        # median time of the hashing of the bytes, over repeated runs
+        samples = benchmark.measure(algorithm, bytes_, repeat=5, warmup=1)
+        hashing_time = benchmark.summarize(samples, len(bytes_))['median_ns'] / 1e9
+
+        return hashing_time, _hexdigest(hashlib.new(algorithm, bytes_))
     
     # encode input text into bytes
     bytes_ = text.encode()
@@ -45,23 +47,130 @@ def test_all_algorithms(text: str) -> None:
     ))
 
 
-def hash_file(file_path: str, algorithm: str = 'sha256') -> str:
+def hash_file(
+        file_path: str, 
+        algorithm: str = 'sha256', 
+        chunk_size: int = DEFAULT_CHUNK_SIZE, 
+        use_mmap: bool = False, 
+        progress: Callable[[int], object] | None = None
+    ) -> str:
     """
     Calculate the hash value of a file using the specified algorithm.
+    The file is read in chunks into a single reused buffer (or memory-mapped), 
+    so memory use does not depend on the size of the file.
 
     Args:
         file_path (str): The path to the file.
         algorithm (str, optional): The hashing algorithm to use. Defaults to 'sha256'.
+        chunk_size (int, optional): The number of bytes hashed at once. Defaults to 1 MiB.
+        use_mmap (bool, optional): Whether to memory-map the file instead of reading it (local files only). Defaults to False.
+        progress (Callable[[int], object], optional): Called with the number of bytes hashed after each chunk, e.g. `tqdm.update`. Defaults to None.
 
     Returns:
         str: The hash value of the file.
 
     Raises:
         FileNotFoundError: If the file does not exist.
+        ValueError: If `chunk_size` is not positive.
+    """
+    if chunk_size <= 0:
+        raise ValueError('chunk_size must be positive')
+
+    hasher = hashlib.new(algorithm)
+
+    with open(file_path, 'rb', buffering=0) as file:
+        for chunk in (_mmap_chunks if use_mmap else _read_chunks)(file, chunk_size):
+            hasher.update(chunk)
+            if progress:
+                progress(len(chunk))
+
+    return _hexdigest(hasher)
+
+
+def hash_file_multi(
+        file_path: str, 
+        algorithms: Iterable[str] = ('md5', 'sha1', 'sha256'), 
+        chunk_size: int = DEFAULT_CHUNK_SIZE, 
+        use_mmap: bool = False, 
+        progress: Callable[[int], object] | None = None
+    ) -> dict[str, str]:
+    """
+    Calculate the hash values of a file using several algorithms in a single pass over the file.
+    Each chunk is read once and fed to all the hashers on separate threads 
+    (`hashlib` releases the GIL while hashing), while the next chunk is being read.
+
+    Args:
+        file_path (str): The path to the file.
+        algorithms (Iterable[str], optional): The hashing algorithms to use. Defaults to ('md5', 'sha1', 'sha256').
+        chunk_size (int, optional): The number of bytes hashed at once. Defaults to 1 MiB.
+        use_mmap (bool, optional): Whether to memory-map the file instead of reading it (local files only). Defaults to False.
+        progress (Callable[[int], object], optional): Called with the number of bytes hashed after each chunk, e.g. `tqdm.update`. Defaults to None.
+
+    Returns:
+        dict[str, str]: The hash value of the file for each algorithm.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+        ValueError: If `chunk_size` is not positive.
     """
-    with open(file_path, 'rb') as file:
-        bytes = file.read()
-        return hashlib.new(algorithm, bytes).hexdigest()
+    if chunk_size <= 0:
+        raise ValueError('chunk_size must be positive')
+
+    hashers = {algorithm: hashlib.new(algorithm) for algorithm in algorithms}
+
+    with (
+        ThreadPoolExecutor(max_workers=max(len(hashers), 1)) as executor, 
+        open(file_path, 'rb', buffering=0) as file
+    ):
+        # two buffers take turns, so the next chunk is read while the previous one is hashed
+        chunks = _mmap_chunks(file, chunk_size) if use_mmap else _read_chunks(file, chunk_size, buffers=2)
+
+        updates = []
+        for chunk in chunks:
+            # every hasher must finish the previous chunk before getting the next one
+            for update in updates:
+                update.result()
+            updates = [executor.submit(hasher.update, chunk) for hasher in hashers.values()]
+
+            if progress:
+                progress(len(chunk))
+
+        for update in updates:
+            update.result()
+
+    return {
+        algorithm: _hexdigest(hasher) 
+        for algorithm, hasher in hashers.items()
+    }
+
+
+def _read_chunks(file, chunk_size: int, buffers: int = 1):
+    # the buffers are reused in turns, each chunk is only valid until its buffer is read into again
+    views = [memoryview(bytearray(chunk_size)) for _ in range(buffers)]
+    
+    for view in itertools.cycle(views):
+        size = file.readinto(view)
+        if not size:
+            break
+        yield view[:size]
+
+
+def _mmap_chunks(file, chunk_size: int):
+    # empty files cannot be memory-mapped
+    if not os.fstat(file.fileno()).st_size:
+        return
+
+    # the mapping is closed once none of its chunks is referenced anymore
+    view = memoryview(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+    for start in range(0, len(view), chunk_size):
+        yield view[start:start + chunk_size]
+
+
+def _hexdigest(hasher) -> str:
+    try:
+        return hasher.hexdigest()
+    except TypeError:   # some hash functions require a length argument
+        return hasher.hexdigest(length=20)
     
 
 def plot_hashing_time(
@@ -71,45 +180,27 @@ def plot_hashing_time(
     """
     Plots the time taken to hash a message (using `plotly`) of given size for different hashing algorithms.
 
-    This function measures the time taken to hash a message of different sizes using
+    This function measures the median time taken to hash a message of different sizes using
     various hashing algorithms (md5, sha1, sha256, sha512). It then plots the results
     on a graph, with message size on the x-axis and time taken on the y-axis.
+    For headless runs with JSON/CSV output use `benchmark.py` instead.
     
     Args:
         algorithms (list[str], optional): The hashing algorithms to test. Defaults to ['md5', 'sha1', 'sha256', 'sha512'].
         message_sizes (list[int], optional): The sizes of the messages to test. Defaults to [2**i for i in range(10, 27)].
     """
-    # helper function to measure the time of hashing a message of given size
-    def measure_hashing_time(algorithm: str ='sha256', number_of_runs: int = 100) -> list[float]:
-        return [
-            timeit.timeit(
-                lambda: hashlib.new(algorithm, ('a' * size).encode()).hexdigest(), 
-                number=number_of_runs
-            )
-            for size in message_sizes            
-        ]
+    # build the messages ahead of time, so their allocation is not measured
+    buffers = benchmark.build_buffers(message_sizes)
 
     # measure the time of hashing a message of given size for each algorithm
-    data = [
-        go.Scatter(
-            x=message_sizes, 
-            y=measure_hashing_time(algorithm), 
-            mode='lines+markers', 
-            name=algorithm
-        )
+    results = [
+        {'algorithm': algorithm, 'size': size, **benchmark.summarize(benchmark.measure(algorithm, data), size)}
         for algorithm in tqdm(algorithms)
+        for size, data in buffers.items()
     ]
 
     # plot the results
-    layout = go.Layout(
-        title='Time of hashing a message of given size for each algorithm',
-        xaxis=dict(title='Message size (bytes)'),
-        yaxis=dict(title='Time (s)'),
-        legend=dict(orientation='h')
-    )
-
-    fig = go.Figure(data=data, layout=layout)
-    fig.show()
+    benchmark.plot(results)
 
 
 if __name__ == "__main__":    
@@ -119,7 +210,9 @@ if __name__ == "__main__":
 
     # 2|3. hash the file
     file_path = input('Enter the path to the file to hash: ')
-    print(f'Hash of the file: {hash_file(file_path)}')
+    with tqdm(total=os.path.getsize(file_path), unit='B', unit_scale=True) as progress_bar:
+        file_hash = hash_file(file_path, progress=progress_bar.update)
+    print(f'Hash of the file: {file_hash}')
 
     # 4. plot the time of hashing a message of given size for each algorithm
     plot_hashing_time()
@@ -0,0 +1,287 @@
+import os
+import re
+import sys
+import json
+import argparse
+from contextlib import nullcontext
+from typing import Callable, Iterable, Iterator, TextIO
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+from main import DEFAULT_CHUNK_SIZE, hash_file
+
+
+# files at least this big are hashed on their own pool, so they do not block the small ones
+LARGE_FILE_SIZE = 64 << 20
+
+# escape sequences of the paths in a `sha256sum` manifest
+_ESCAPES = {'\\': '\\\\', '\n': '\\n', '\r': '\\r'}
+_UNESCAPES = {'\\': '\\', 'n': '\n', 'r': '\r'}
+
+
+def _report_error(path: str, error: OSError) -> None:
+    print(f'{path}: {error.strerror or error}', file=sys.stderr)
+
+
+def walk_files(root: str, on_error: Callable[[str, OSError], object] = _report_error) -> Iterator[tuple[str, int]]:
+    """
+    Walks the directory tree and yields every regular file in it (symbolic links are not followed).
+    Directories and files that cannot be read are reported to `on_error` and skipped.
+
+    Args:
+        root (str): The root directory.
+        on_error (Callable[[str, OSError], object], optional): Called with the path and the error of each skipped entry. Defaults to printing it to standard error.
+
+    Yields:
+        tuple[str, int]: The path of the file relative to the root (with `/` separators) and its size.
+    """
+    stack = ['']
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(os.path.join(root, directory)) as entries:
+                entries = sorted(entries, key=lambda entry: entry.name)
+        except OSError as error:
+            on_error(directory or '.', error)
+            continue
+
+        for entry in entries:
+            path = f'{directory}/{entry.name}' if directory else entry.name
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield path, entry.stat(follow_symlinks=False).st_size
+            except OSError as error:
+                on_error(path, error)
+
+
+def _schedule(
+        items: Iterable[tuple[str, int]],
+        task: Callable[[str], object],
+        workers: int,
+        large_workers: int
+    ) -> Iterator[tuple[str, int, object]]:
+    # small and large files go to separate pools, the number of files in flight is bounded,
+    # a file that fails with an `OSError` yields the error, so one bad file does not stop the others
+    limit = 4 * (workers + large_workers)
+
+    with ThreadPoolExecutor(workers) as small_pool, ThreadPoolExecutor(large_workers) as large_pool:
+        pending: dict[Future, tuple[str, int]] = {}
+
+        def drain(until: int) -> Iterator[tuple[str, int, object]]:
+            while len(pending) > until:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        result = future.result()
+                    except OSError as error:
+                        result = error
+                    yield *pending.pop(future), result
+
+        for path, size in items:
+            pool = large_pool if size >= LARGE_FILE_SIZE else small_pool
+            pending[pool.submit(task, path)] = path, size
+            yield from drain(limit - 1)
+
+        yield from drain(0)
+
+
+def hash_tree(
+        root: str,
+        algorithm: str = 'sha256',
+        workers: int = 8,
+        large_workers: int = 2,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        on_error: Callable[[str, OSError], object] = _report_error
+    ) -> Iterator[tuple[str, int, str]]:
+    """
+    Hashes every file in the directory tree on a bounded thread pool (`hashlib` releases the GIL).
+    Large files are hashed on a separate, smaller pool, so the small files keep the disk busy meanwhile.
+    Results are yielded as soon as they are ready, not in the order of the files.
+    Files that cannot be read (or are deleted before they are hashed) are reported to `on_error` and left out.
+
+    Args:
+        root (str): The root directory.
+        algorithm (str, optional): The hashing algorithm to use. Defaults to 'sha256'.
+        workers (int, optional): The number of threads hashing small files. Defaults to 8.
+        large_workers (int, optional): The number of threads hashing large files. Defaults to 2.
+        chunk_size (int, optional): The number of bytes hashed at once. Defaults to 1 MiB.
+        on_error (Callable[[str, OSError], object], optional): Called with the path and the error of each skipped file. Defaults to printing it to standard error.
+
+    Yields:
+        tuple[str, int, str]: The path of the file relative to the root, its size and its hash value.
+    """
+    def task(path: str) -> str:
+        return hash_file(os.path.join(root, path), algorithm, chunk_size)
+
+    for path, size, digest in _schedule(walk_files(root, on_error), task, workers, large_workers):
+        if isinstance(digest, OSError):
+            on_error(path, digest)
+        else:
+            yield path, size, digest
+
+
+def _escape(path: str) -> tuple[str, str]:
+    # the same escaping as the one of `sha256sum`
+    escaped = re.sub(r'[\\\n\r]', lambda match: _ESCAPES[match.group()], path)
+    return ('\\' if escaped != path else ''), escaped
+
+
+def _unescape(path: str) -> str:
+    return re.sub(r'\\(.)', lambda match: _UNESCAPES.get(match.group(1), match.group(1)), path)
+
+
+def write_manifest(
+        entries: Iterable[tuple[str, int, str]],
+        file: TextIO,
+        algorithm: str = 'sha256',
+        format: str = 'sha256sum'
+    ) -> None:
+    """
+    Writes the hashed files as a manifest, one line per file, as they come.
+
+    Args:
+        entries (Iterable[tuple[str, int, str]]): The path, size and hash value of each file, as yielded by `hash_tree`.
+        file (TextIO): The stream to write the manifest to.
+        algorithm (str, optional): The hashing algorithm used, recorded in the `jsonl` format. Defaults to 'sha256'.
+        format (str, optional): Either 'sha256sum' (compatible with `sha256sum -c`) or 'jsonl'. Defaults to 'sha256sum'.
+    """
+    for path, size, digest in entries:
+        if format == 'jsonl':
+            line = json.dumps({'path': path, 'size': size, 'algorithm': algorithm, 'digest': digest})
+        else:
+            prefix, escaped = _escape(path)
+            line = f'{prefix}{digest}  {escaped}'
+
+        file.write(line + '\n')
+        file.flush()
+
+
+def read_manifest(file: TextIO) -> Iterator[tuple[str, str, str | None]]:
+    """
+    Reads a manifest written by `write_manifest` (or by `sha256sum`), detecting its format.
+
+    Args:
+        file (TextIO): The stream to read the manifest from.
+
+    Yields:
+        tuple[str, str, str | None]: The path of each file, its hash value and the hashing algorithm
+            (recorded in the `jsonl` format only, None otherwise).
+    """
+    for line in file:
+        line = line.rstrip('\n')
+        if not line:
+            continue
+
+        if line.startswith('{'):
+            entry = json.loads(line)
+            yield entry['path'], entry['digest'], entry.get('algorithm')
+            continue
+
+        escaped = line.startswith('\\')
+        digest, path = line.removeprefix('\\').split(' ', 1)
+
+        # text (`  `) and binary (` *`) mode markers
+        path = path[1:]
+        yield (_unescape(path) if escaped else path), digest, None
+
+
+def verify_tree(
+        root: str,
+        manifest: TextIO,
+        algorithm: str | None = None,
+        workers: int = 8,
+        large_workers: int = 2,
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Iterator[tuple[str, str]]:
+    """
+    Checks the files of the directory tree against a manifest, hashing them in parallel.
+
+    Args:
+        root (str): The root directory.
+        manifest (TextIO): The stream to read the manifest from.
+        algorithm (str, optional): The hashing algorithm the manifest was written with.
+            Defaults to the one recorded in each entry (`jsonl`), or 'sha256'.
+        workers (int, optional): The number of threads hashing small files. Defaults to 8.
+        large_workers (int, optional): The number of threads hashing large files. Defaults to 2.
+        chunk_size (int, optional): The number of bytes hashed at once. Defaults to 1 MiB.
+
+    Yields:
+        tuple[str, str]: The path of each file in the manifest and its status: 'OK', 'FAILED', 'MISSING'
+            or 'ERROR' (e.g. it is not readable or is a directory).
+
+    Raises:
+        ValueError: If an entry records another algorithm than the given one.
+    """
+    # the manifest is read (and checked) as a whole before any file is hashed
+    expected = {}
+    for path, digest, recorded in read_manifest(manifest):
+        if algorithm and recorded and recorded.lower() != algorithm.lower():
+            raise ValueError(f'{path} was hashed with {recorded}, not {algorithm}')
+        expected[path] = digest, recorded or algorithm or 'sha256'
+
+    def size(path: str) -> int:
+        try:
+            return os.path.getsize(os.path.join(root, path))
+        except OSError:
+            return 0
+
+    def task(path: str) -> str:
+        try:
+            expected_digest, path_algorithm = expected[path]
+            digest = hash_file(os.path.join(root, path), path_algorithm, chunk_size)
+        except FileNotFoundError:
+            return 'MISSING'
+        return 'OK' if digest == expected_digest else 'FAILED'
+
+    files = ((path, size(path)) for path in expected)
+    for path, _, status in _schedule(files, task, workers, large_workers):
+        yield path, 'ERROR' if isinstance(status, OSError) else status
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Hash a directory tree into a manifest or verify it against one.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    hash_parser = subparsers.add_parser('hash', help='write a manifest of the directory tree')
+    hash_parser.add_argument('root')
+    hash_parser.add_argument('-o', '--output', help='manifest file, standard output by default')
+    hash_parser.add_argument('--format', choices=['sha256sum', 'jsonl'], default='sha256sum')
+
+    verify_parser = subparsers.add_parser('verify', help='check the directory tree against a manifest')
+    verify_parser.add_argument('root')
+    verify_parser.add_argument('manifest')
+
+    hash_parser.add_argument('-a', '--algorithm', default='sha256')
+    verify_parser.add_argument('-a', '--algorithm', help='sha256 by default, or the one recorded in a jsonl manifest')
+
+    for subparser in (hash_parser, verify_parser):
+        subparser.add_argument('-j', '--workers', type=int, default=8)
+        subparser.add_argument('--large-workers', type=int, default=2)
+
+    args = parser.parse_args()
+
+    if args.command == 'hash':
+        errors = []
+
+        def report(path: str, error: OSError) -> None:
+            _report_error(path, error)
+            errors.append(path)
+
+        output = open(args.output, 'w', encoding='utf-8') if args.output else nullcontext(sys.stdout)
+        with output as output:
+            entries = hash_tree(args.root, args.algorithm, args.workers, args.large_workers, on_error=report)
+            write_manifest(entries, output, args.algorithm, args.format)
+
+        sys.exit(1 if errors else 0)
+    else:
+        failures = 0
+        with open(args.manifest, encoding='utf-8') as manifest:
+            try:
+                for path, status in verify_tree(args.root, manifest, args.algorithm, args.workers, args.large_workers):
+                    print(f'{path}: {status}')
+                    failures += status != 'OK'
+            except ValueError as error:
+                parser.error(str(error))
+
+        sys.exit(1 if failures else 0)
@@ -0,0 +1,236 @@
+import os
+import sys
+import json
+import hashlib
+import argparse
+from typing import Iterable, TextIO
+from concurrent.futures import ThreadPoolExecutor
+
+from main import DEFAULT_CHUNK_SIZE
+
+
+# number of bytes covered by a single leaf of the tree
+DEFAULT_BLOCK_SIZE = 4 << 20
+
+# prefixes that keep leaves and inner nodes apart (as in RFC 6962)
+_LEAF, _NODE = b'\x00', b'\x01'
+
+
+def _hash_block(fd: int, offset: int, size: int, algorithm: str, chunk_size: int) -> bytes:
+    # `os.pread` does not move the file position, so the threads can share the descriptor
+    hasher = hashlib.new(algorithm, _LEAF)
+    end = offset + size
+
+    while offset < end:
+        chunk = os.pread(fd, min(chunk_size, end - offset), offset)
+        if not chunk:
+            break
+        hasher.update(chunk)
+        offset += len(chunk)
+
+    return hasher.digest()
+
+
+def hash_blocks(
+        file_path: str,
+        algorithm: str = 'sha256',
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        blocks: Iterable[int] | None = None,
+        workers: int = 8,
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> dict[int, bytes]:
+    """
+    Hashes fixed-size blocks of a file in parallel on a thread pool (`hashlib` releases the GIL).
+
+    Args:
+        file_path (str): The path to the file.
+        algorithm (str, optional): The hashing algorithm to use. Defaults to 'sha256'.
+        block_size (int, optional): The size of a block in bytes. Defaults to 4 MiB.
+        blocks (Iterable[int], optional): The indices of the blocks to hash. Defaults to all the blocks of the file.
+        workers (int, optional): The number of threads hashing the blocks. Defaults to 8.
+        chunk_size (int, optional): The number of bytes read at once. Defaults to 1 MiB.
+
+    Returns:
+        dict[int, bytes]: The leaf hash of each block. An empty file has a single, empty block.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+    """
+    fd = os.open(file_path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+    try:
+        if blocks is None:
+            blocks = range(max(1, -(-os.fstat(fd).st_size // block_size)))
+        blocks = list(blocks)
+
+        with ThreadPoolExecutor(workers) as executor:
+            digests = executor.map(
+                lambda block: _hash_block(fd, block * block_size, block_size, algorithm, chunk_size),
+                blocks
+            )
+            return dict(zip(blocks, digests))
+    finally:
+        os.close(fd)
+
+
+def merkle_root(leaves: list[bytes], algorithm: str = 'sha256') -> bytes:
+    """
+    Combines the leaf hashes into the root of a binary Merkle tree.
+    A node without a sibling is promoted to the next level as it is.
+
+    Args:
+        leaves (list[bytes]): The leaf hashes, in the order of the blocks.
+        algorithm (str, optional): The hashing algorithm to use. Defaults to 'sha256'.
+
+    Returns:
+        bytes: The root hash.
+    """
+    level = list(leaves)
+    while len(level) > 1:
+        level = [
+            hashlib.new(algorithm, _NODE + level[i] + level[i + 1]).digest() if i + 1 < len(level) else level[i]
+            for i in range(0, len(level), 2)
+        ]
+
+    return level[0]
+
+
+def tree_hash(
+        file_path: str,
+        algorithm: str = 'sha256',
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        workers: int = 8
+    ) -> dict:
+    """
+    Calculates the Merkle tree hash of a file, hashing its blocks in parallel.
+
+    Args:
+        file_path (str): The path to the file.
+        algorithm (str, optional): The hashing algorithm to use. Defaults to 'sha256'.
+        block_size (int, optional): The size of a block in bytes. Defaults to 4 MiB.
+        workers (int, optional): The number of threads hashing the blocks. Defaults to 8.
+
+    Returns:
+        dict: The algorithm, block size, file size, root and leaf hashes (hex encoded), as stored by `write_tree`.
+    """
+    size = os.path.getsize(file_path)
+    leaves = hash_blocks(file_path, algorithm, block_size, workers=workers)
+    leaves = [leaves[block] for block in sorted(leaves)]
+
+    return {
+        'algorithm': algorithm,
+        'block_size': block_size,
+        'size': size,
+        'root': merkle_root(leaves, algorithm).hex(),
+        'leaves': [leaf.hex() for leaf in leaves],
+    }
+
+
+def write_tree(tree: dict, file: TextIO) -> None:
+    json.dump(tree, file, indent=1)
+
+
+def read_tree(file: TextIO) -> dict:
+    """
+    Reads a tree written by `write_tree` and checks that its leaves add up to its root.
+
+    Args:
+        file (TextIO): The stream to read the tree from.
+
+    Returns:
+        dict: The tree.
+
+    Raises:
+        ValueError: If the leaves do not match the root.
+    """
+    tree = json.load(file)
+    leaves = [bytes.fromhex(leaf) for leaf in tree['leaves']]
+
+    if merkle_root(leaves, tree['algorithm']).hex() != tree['root']:
+        raise ValueError('The leaf hashes do not match the root')
+
+    return tree
+
+
+def verify_ranges(
+        file_path: str,
+        tree: dict,
+        ranges: Iterable[tuple[int, int]] | None = None,
+        workers: int = 8
+    ) -> list[int]:
+    """
+    Checks a file against its tree, re-hashing only the blocks overlapping the given byte ranges.
+
+    Args:
+        file_path (str): The path to the file.
+        tree (dict): The tree of the file, as returned by `tree_hash` or `read_tree`.
+        ranges (Iterable[tuple[int, int]], optional): The byte ranges to check, as [start, end) pairs. Defaults to the whole file.
+        workers (int, optional): The number of threads hashing the blocks. Defaults to 8.
+
+    Returns:
+        list[int]: The indices of the blocks that do not match, in ascending order.
+    """
+    block_size = tree['block_size']
+    leaves = tree['leaves']
+    size = max(tree['size'], os.path.getsize(file_path))
+
+    if ranges is None:
+        ranges = [(0, size)]
+
+    blocks = set()
+    for start, end in ranges:
+        end = min(end, size)
+        blocks.update(range(start // block_size, -(-end // block_size)))
+
+    # the file might have grown past the blocks of the tree
+    count = max(1, -(-size // block_size))
+    blocks = sorted(block for block in blocks if block < count)
+
+    digests = hash_blocks(file_path, tree['algorithm'], block_size, blocks, workers)
+
+    return [
+        block for block in blocks
+        if block >= len(leaves) or digests[block].hex() != leaves[block]
+    ]
+
+
+def _parse_range(value: str) -> tuple[int, int]:
+    start, _, end = value.partition(':')
+    return int(start or 0), int(end) if end else sys.maxsize
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Hash a file into a Merkle tree or verify parts of it against one.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    hash_parser = subparsers.add_parser('hash', help='write the leaf hashes of the file and print its root')
+    hash_parser.add_argument('path')
+    hash_parser.add_argument('-o', '--output', help='where to write the tree, `<path>.merkle.json` by default')
+    hash_parser.add_argument('-a', '--algorithm', default='sha256')
+    hash_parser.add_argument('-b', '--block-size', type=int, default=DEFAULT_BLOCK_SIZE)
+
+    verify_parser = subparsers.add_parser('verify', help='re-hash the given byte ranges and report the mismatched blocks')
+    verify_parser.add_argument('path')
+    verify_parser.add_argument('tree', help='tree written by the `hash` command')
+    verify_parser.add_argument('-r', '--range', type=_parse_range, action='append', dest='ranges', help='START:END byte range, the whole file by default')
+
+    for subparser in (hash_parser, verify_parser):
+        subparser.add_argument('-j', '--workers', type=int, default=8)
+
+    args = parser.parse_args()
+
+    if args.command == 'hash':
+        tree = tree_hash(args.path, args.algorithm, args.block_size, args.workers)
+        with open(args.output or f'{args.path}.merkle.json', 'w') as file:
+            write_tree(tree, file)
+        print(f"{tree['root']}  {args.path}")
+    else:
+        with open(args.tree) as file:
+            tree = read_tree(file)
+
+        mismatched = verify_ranges(args.path, tree, args.ranges, args.workers)
+        for block in mismatched:
+            start = block * tree['block_size']
+            print(f"block {block} [{start}:{start + tree['block_size']}]: FAILED")
+        print(f'{len(mismatched)} mismatched blocks', file=sys.stderr)
+
+        sys.exit(1 if mismatched else 0)
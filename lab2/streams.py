@@ -0,0 +1,135 @@
+import asyncio
+import hashlib
+import inspect
+from typing import AsyncIterable, Awaitable, BinaryIO, Callable, Iterable
+
+from main import DEFAULT_CHUNK_SIZE, _hexdigest
+
+
+# chunks at least this big are hashed on a thread (`hashlib` releases the GIL), smaller ones inline
+OFFLOAD_SIZE = 64 << 10
+
+# number of chunks received but not hashed yet, the stream is not read any further meanwhile
+MAX_PENDING = 4
+
+_END = None
+
+
+def _update(hashers: Iterable, chunk: bytes) -> None:
+    for hasher in hashers:
+        hasher.update(chunk)
+
+
+async def hash_stream(
+        stream: AsyncIterable[bytes],
+        algorithms: Iterable[str] = ('sha256',),
+        tee: Callable[[bytes], Awaitable[object] | object] | None = None,
+        offload_size: int = OFFLOAD_SIZE,
+        max_pending: int = MAX_PENDING,
+        progress: Callable[[int], object] | None = None
+    ) -> dict[str, str]:
+    """
+    Calculate the hash values of an asynchronous stream of bytes (e.g. a request body) without blocking the event loop.
+    Large chunks are hashed on the default executor while the next ones are received.
+    At most `max_pending` chunks are held at once, a slow hasher stops the stream from being read.
+
+    Args:
+        stream (AsyncIterable[bytes]): The chunks of data, which must not be modified after they are yielded.
+        algorithms (Iterable[str], optional): The hashing algorithms to use. Defaults to ('sha256',).
+        tee (Callable[[bytes], Awaitable[object] | object], optional): Also called with every chunk (and awaited if it is a coroutine), e.g. to write the stream to disk. Defaults to None.
+        offload_size (int, optional): The size of the chunks hashed on a thread instead of the event loop. Defaults to 64 KiB.
+        max_pending (int, optional): The number of chunks received but not hashed yet. Defaults to 4.
+        progress (Callable[[int], object], optional): Called with the number of bytes hashed after each chunk. Defaults to None.
+
+    Returns:
+        dict[str, str]: The hash value of the stream for each algorithm, keyed as requested (as by `hash_file_multi`).
+    """
+    hashers = {algorithm: hashlib.new(algorithm) for algorithm in algorithms}
+    queue: asyncio.Queue[bytes | None] = asyncio.Queue(max_pending)
+    loop = asyncio.get_running_loop()
+
+    async def receive() -> None:
+        async for chunk in stream:
+            if tee is not None:
+                result = tee(chunk)
+                if inspect.isawaitable(result):
+                    await result
+            # waits while the queue is full, which is what bounds the memory
+            await queue.put(chunk)
+        await queue.put(_END)
+
+    async def digest() -> None:
+        while (chunk := await queue.get()) is not _END:
+            if len(chunk) >= offload_size:
+                await loop.run_in_executor(None, _update, hashers.values(), chunk)
+            else:
+                _update(hashers.values(), chunk)
+
+            if progress:
+                progress(len(chunk))
+
+    tasks = [asyncio.create_task(receive()), asyncio.create_task(digest())]
+    try:
+        # a failure of either side cancels the other one
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    for task in tasks:
+        if task.done() and not task.cancelled() and task.exception():
+            raise task.exception()
+
+    return {algorithm: _hexdigest(hasher) for algorithm, hasher in hashers.items()}
+
+
+async def read_chunks(file: BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> AsyncIterable[bytes]:
+    """
+    Reads a (blocking) binary file in chunks on the default executor.
+
+    Args:
+        file (BinaryIO): The file to read.
+        chunk_size (int, optional): The number of bytes read at once. Defaults to 1 MiB.
+
+    Yields:
+        bytes: The chunks of the file.
+    """
+    loop = asyncio.get_running_loop()
+    while chunk := await loop.run_in_executor(None, file.read, chunk_size):
+        yield chunk
+
+
+def file_writer(file: BinaryIO) -> Callable[[bytes], Awaitable[object]]:
+    """
+    Makes a `tee` for `hash_stream` that writes the chunks to a (blocking) binary file on the default executor.
+
+    Args:
+        file (BinaryIO): The file to write to.
+
+    Returns:
+        Callable[[bytes], Awaitable[object]]: The coroutine function writing a chunk.
+    """
+    async def write(chunk: bytes) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, file.write, chunk)
+
+    return write
+
+
+async def copy_and_hash(
+        stream: AsyncIterable[bytes],
+        file_path: str,
+        algorithms: Iterable[str] = ('sha256',)
+    ) -> dict[str, str]:
+    """
+    Writes the stream to a file while hashing it, e.g. to store an upload.
+
+    Args:
+        stream (AsyncIterable[bytes]): The chunks of data.
+        file_path (str): The path of the file to write.
+        algorithms (Iterable[str], optional): The hashing algorithms to use. Defaults to ('sha256',).
+
+    Returns:
+        dict[str, str]: The hash value of the stream for each algorithm.
+    """
+    with open(file_path, 'wb') as file:
+        return await hash_stream(stream, algorithms, tee=file_writer(file))
@@ -0,0 +1,328 @@
+import io
+import os
+import hashlib
+
+import pytest
+
+import manifest
+from cache import HashCache
+from main import hash_file, hash_file_multi
+from manifest import hash_tree, read_manifest, verify_tree, write_manifest
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    # not a multiple of the chunk sizes used below, so the last chunk is partial
+    data = bytes(range(256)) * 4099
+    path = tmp_path / "data.bin"
+    path.write_bytes(data)
+    return str(path), data
+
+
+@pytest.mark.parametrize("chunk_size", [1, 4096, 1 << 20])
+def test_hash_file_mmap_parity(data_file, chunk_size):
+    path, data = data_file
+    expected = hashlib.sha256(data).hexdigest()
+    assert hash_file(path, chunk_size=chunk_size) == expected
+    assert hash_file(path, chunk_size=chunk_size, use_mmap=True) == expected
+
+
+def test_hash_file_empty(tmp_path):
+    path = tmp_path / "empty"
+    path.write_bytes(b"")
+    assert hash_file(str(path), use_mmap=True) == hashlib.sha256().hexdigest()
+    assert hash_file_multi(str(path), ["md5"], use_mmap=True) == {"md5": hashlib.md5().hexdigest()}
+
+
+@pytest.mark.parametrize("use_mmap", [False, True])
+def test_hash_file_multi_parity(data_file, use_mmap):
+    path, data = data_file
+    algorithms = ["md5", "sha1", "sha256", "blake2b"]
+    digests = hash_file_multi(path, algorithms, chunk_size=4096, use_mmap=use_mmap)
+    assert digests == {algorithm: hashlib.new(algorithm, data).hexdigest() for algorithm in algorithms}
+    assert digests["sha256"] == hash_file(path, chunk_size=4096)
+
+
+@pytest.mark.parametrize("chunk_size", [0, -1])
+@pytest.mark.parametrize("use_mmap", [False, True])
+def test_hash_file_chunk_size_must_be_positive(data_file, chunk_size, use_mmap):
+    path, _ = data_file
+    with pytest.raises(ValueError, match="chunk_size must be positive"):
+        hash_file(path, chunk_size=chunk_size, use_mmap=use_mmap)
+    with pytest.raises(ValueError, match="chunk_size must be positive"):
+        hash_file_multi(path, chunk_size=chunk_size, use_mmap=use_mmap)
+
+def test_hash_file_progress(data_file):
+    path, data = data_file
+    sizes = []
+    hash_file(path, chunk_size=4096, progress=sizes.append)
+    assert sum(sizes) == len(data)
+
+
+
+@pytest.mark.parametrize("path, escaped", [
+    ("plain.txt", False),
+    ("dir/back\\slash", True),
+    ("new\nline", True),
+    ("carriage\rreturn", True),
+])
+def test_manifest_round_trip(path, escaped):
+    output = io.StringIO()
+    write_manifest([(path, 1, "ab" * 32)], output)
+    line = output.getvalue()
+    assert line.count("\n") == 1 and "\r" not in line
+    assert line.startswith("\\") == escaped
+    assert list(read_manifest(io.StringIO(line))) == [(path, "ab" * 32, None)]
+
+
+def test_manifest_recorded_algorithm(tmp_path):
+    (tmp_path / "a.txt").write_bytes(b"a")
+    output = io.StringIO()
+    write_manifest(hash_tree(str(tmp_path), "blake2b"), output, "blake2b", format="jsonl")
+
+    assert list(verify_tree(str(tmp_path), io.StringIO(output.getvalue()))) == [("a.txt", "OK")]
+    assert list(verify_tree(str(tmp_path), io.StringIO(output.getvalue()), "blake2b")) == [("a.txt", "OK")]
+    with pytest.raises(ValueError, match="blake2b"):
+        list(verify_tree(str(tmp_path), io.StringIO(output.getvalue()), "sha256"))
+
+def test_manifest_unreadable_files(tmp_path, monkeypatch):
+    for name in ["a.txt", "b.txt", "c.txt"]:
+        (tmp_path / name).write_bytes(name.encode())
+
+    def hash_or_fail(path, *args):
+        if path.endswith("b.txt"):
+            raise PermissionError(13, "Permission denied")
+        return hash_file(path, *args)
+
+    errors = []
+    with monkeypatch.context() as patch:
+        patch.setattr(manifest, "hash_file", hash_or_fail)
+        entries = list(hash_tree(str(tmp_path), on_error=lambda path, error: errors.append(path)))
+    assert sorted(path for path, _, _ in entries) == ["a.txt", "c.txt"]
+    assert errors == ["b.txt"]
+
+    (tmp_path / "c.txt").unlink()
+    (tmp_path / "d").mkdir()
+    lines = [f"{digest}  {path}\n" for path, _, digest in entries] + [f"{'0' * 64}  d\n"]
+    assert dict(verify_tree(str(tmp_path), io.StringIO("".join(lines)))) == {"a.txt": "OK", "c.txt": "MISSING", "d": "ERROR"}
+
+
+
+def test_hash_cache_invalidation(tmp_path):
+    path = tmp_path / "file"
+    path.write_bytes(b"first")
+    with HashCache(str(tmp_path / "cache.sqlite3")) as cache:
+        assert cache.hash_file(str(path)) == hashlib.sha256(b"first").hexdigest()
+        assert cache.hash_file(str(path)) == hashlib.sha256(b"first").hexdigest()
+        assert (cache.hits, cache.misses) == (1, 1)
+
+        # same size, different modification time
+        path.write_bytes(b"secnd")
+        os.utime(path, ns=(0, 1))
+        assert cache.hash_file(str(path)) == hashlib.sha256(b"secnd").hexdigest()
+
+        # different size, same modification time
+        path.write_bytes(b"third!")
+        os.utime(path, ns=(0, 1))
+        assert cache.hash_file(str(path)) == hashlib.sha256(b"third!").hexdigest()
+        assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_hash_cache_purge(tmp_path):
+    paths = [tmp_path / name for name in ["kept", "changed", "deleted"]]
+    for path in paths:
+        path.write_bytes(path.name.encode())
+    with HashCache(str(tmp_path / "cache.sqlite3")) as cache:
+        cache.hash_files(map(str, paths))
+        paths[1].write_bytes(b"changed again")
+        paths[2].unlink()
+        assert cache.purge() == 2
+        assert cache.purge() == 0
+        cache.hash_file(str(paths[0]))
+        assert cache.hits == 1
+
+
+def test_hash_cache_keeps_digests_on_errors(tmp_path):
+    paths = [str(tmp_path / name) for name in ["a", "b"]]
+    for path in paths:
+        open(path, "wb").close()
+    missing = str(tmp_path / "missing")
+    with HashCache(str(tmp_path / "cache.sqlite3")) as cache:
+        with pytest.raises(FileNotFoundError):
+            cache.hash_files([paths[0], missing, paths[1]])
+
+        errors = []
+        digests = cache.hash_files([paths[0], missing, paths[1]], on_error=lambda path, error: errors.append(path))
+        assert list(digests) == paths
+        assert errors == [missing]
+        assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_scaling_baseline_is_one_worker():
+    from benchmark import run_scaling
+    results = run_scaling(["md5"], [4, 2], ["thread"], size=1 << 12, number=1, repeat=1)
+    assert [result["workers"] for result in results] == [1, 2, 4]
+    assert results[0]["speedup"] == 1
+    assert results[2]["efficiency"] == pytest.approx(results[2]["speedup"] / 4)
+
+
+@pytest.fixture
+def merkle_file(tmp_path):
+    from merkle import tree_hash
+    path = tmp_path / "blocks.bin"
+    path.write_bytes(bytes(range(256)) * 40)  # 10 blocks of 1 KiB
+    return str(path), tree_hash(str(path), block_size=1024)
+
+
+def test_merkle_tree_round_trip(merkle_file):
+    from merkle import merkle_root, read_tree, write_tree
+    path, tree = merkle_file
+    assert len(tree["leaves"]) == 10
+    assert tree["root"] == merkle_root([bytes.fromhex(leaf) for leaf in tree["leaves"]]).hex()
+
+    output = io.StringIO()
+    write_tree(tree, output)
+    assert read_tree(io.StringIO(output.getvalue())) == tree
+
+    tree["root"] = "00" * 32
+    output = io.StringIO()
+    write_tree(tree, output)
+    with pytest.raises(ValueError):
+        read_tree(io.StringIO(output.getvalue()))
+
+
+def test_merkle_verify_ranges_blocks(merkle_file, monkeypatch):
+    import merkle
+    path, tree = merkle_file
+    with open(path, "r+b") as file:
+        file.seek(3 * 1024 + 5)
+        file.write(b"corrupt")
+    assert merkle.verify_ranges(path, tree) == [3]
+
+    hashed = []
+    hash_blocks = merkle.hash_blocks
+    monkeypatch.setattr(merkle, "hash_blocks", lambda *args: hashed.append(args[3]) or hash_blocks(*args))
+
+    # [start, end) ranges map to the blocks they overlap
+    assert merkle.verify_ranges(path, tree, [(0, 1024), (2048, 3073)]) == [3]
+    assert hashed[-1] == [0, 2, 3]
+    assert merkle.verify_ranges(path, tree, [(1023, 1025), (9000, 1 << 40)]) == []
+    assert hashed[-1] == [0, 1, 8, 9]
+
+
+def test_merkle_verify_ranges_size_change(merkle_file):
+    from merkle import verify_ranges
+    path, tree = merkle_file
+    with open(path, "ab") as file:
+        file.write(b"grown")
+    assert verify_ranges(path, tree) == [10]
+
+    with open(path, "r+b") as file:
+        file.truncate(8 * 1024 + 1)
+    assert verify_ranges(path, tree) == [8, 9]
+    assert verify_ranges(path, tree, [(0, 8 * 1024)]) == []
+
+
+async def _chunks(chunks, error=None):
+    for chunk in chunks:
+        yield chunk
+    if error is not None:
+        raise error
+
+
+def test_hash_stream_algorithm_names():
+    import asyncio
+    from streams import hash_stream
+    chunks = [b"a" * 100_000, b"b" * 10]
+    digests = asyncio.run(hash_stream(_chunks(chunks), ["SHA256", "md5"]))
+    assert digests == {
+        "SHA256": hashlib.sha256(b"".join(chunks)).hexdigest(),
+        "md5": hashlib.md5(b"".join(chunks)).hexdigest(),
+    }
+
+
+def test_hash_stream_propagates_errors():
+    import asyncio
+    from streams import hash_stream
+
+    class Disconnected(Exception):
+        pass
+
+    with pytest.raises(Disconnected):
+        asyncio.run(hash_stream(_chunks([b"a"] * 10, Disconnected())))
+
+    def tee(chunk):
+        raise OSError(28, "No space left on device")
+
+    with pytest.raises(OSError):
+        asyncio.run(hash_stream(_chunks([b"a"] * 10), tee=tee))
+
+    # a failing hasher stops the stream from being read any further
+    received = []
+
+    async def stream():
+        for i in range(100):
+            received.append(i)
+            yield "not bytes"
+
+    with pytest.raises(TypeError):
+        asyncio.run(hash_stream(stream(), max_pending=2))
+    assert len(received) <= 4
+
+
+def test_find_duplicates_hard_links(tmp_path):
+    from dedup import find_duplicates, reclaimable_bytes
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "a").write_bytes(b"same")
+    (tmp_path / "sub" / "b").write_bytes(b"same")
+    (tmp_path / "c").write_bytes(b"diff")
+    os.link(tmp_path / "a", tmp_path / "a-link")
+    os.link(tmp_path / "c", tmp_path / "c-link")
+
+    groups = find_duplicates([str(tmp_path)])
+    assert len(groups) == 1
+    size, paths = groups[0]
+    assert size == 4
+    # one of the hard links of `a` stands for both
+    assert len(paths) == 2 and os.path.join(str(tmp_path), "sub", "b") in paths
+    assert reclaimable_bytes(groups) == 4
+
+
+def test_find_duplicates_same_ends(tmp_path):
+    from dedup import find_duplicates
+    # the same first and last bytes, only the full hash tells them apart
+    middle = [b"x", b"y", b"x"]
+    for name, byte in zip("abc", middle):
+        (tmp_path / name).write_bytes(b"0" * 100 + byte + b"1" * 100)
+
+    assert find_duplicates([str(tmp_path)], partial_size=64) == [
+        (201, [os.path.join(str(tmp_path), "a"), os.path.join(str(tmp_path), "c")])
+    ]
+    assert find_duplicates([str(tmp_path)], min_size=202) == []
+
+
+def test_find_duplicates_unreadable_file(tmp_path, monkeypatch):
+    import dedup
+    for name in "abc":
+        (tmp_path / name).write_bytes(b"same")
+    for name in "xy":
+        (tmp_path / name).write_bytes(b"diff")
+    gone = os.path.join(str(tmp_path), "b")
+
+    # `b` is deleted after the walk, just before it is hashed
+    partial_hash = dedup._partial_hash
+
+    def deleting_partial_hash(path, *args):
+        if path == gone:
+            os.remove(path)
+        return partial_hash(path, *args)
+
+    monkeypatch.setattr(dedup, "_partial_hash", deleting_partial_hash)
+
+    errors = []
+    groups = dedup.find_duplicates([str(tmp_path)], on_error=lambda path, error: errors.append(path))
+    assert errors == [gone]
+    assert sorted(paths for _, paths in groups) == [
+        [os.path.join(str(tmp_path), name) for name in "ac"],
+        [os.path.join(str(tmp_path), name) for name in "xy"],
+    ]
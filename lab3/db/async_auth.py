@@ -0,0 +1,202 @@
+import os
+import asyncio
+import threading
+from functools import lru_cache
+from typing import Any, Callable
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+from .models import UserModel, check_password, hash_password
+from . import auth
+from .auth import _get_user, _insert_user, _save_user
+from .throttle import ThrottledError
+
+
+# number of threads (or processes) running the key derivation
+KDF_WORKERS = int(os.getenv('KDF_WORKERS', os.cpu_count() or 1))
+# number of key derivations admitted at once (running or queued), the rest is rejected
+KDF_MAX_PENDING = int(os.getenv('KDF_MAX_PENDING', 4 * KDF_WORKERS))
+
+
+class OverloadedError(RuntimeError):
+    """
+    Raised when the key derivation pool does not admit any more work.
+    """
+
+
+class KdfPool:
+    """
+    Bounded pool running the key derivations off the event loop.
+    At most `max_pending` derivations are admitted at once, any more are rejected right away
+    with `OverloadedError`, so a spike of logins cannot queue up unbounded work.
+    A derivation stays pending until its job is done (or cancelled before it starts),
+    even if the caller awaiting it is cancelled meanwhile.
+
+    Attributes:
+        workers (int): The number of threads (or processes).
+        max_pending (int): The number of derivations admitted at once.
+        pending (int): The number of admitted derivations, running or queued.
+        admitted (int): The number of derivations admitted so far.
+        rejected (int): The number of derivations rejected so far.
+        peak_pending (int): The highest number of pending derivations so far.
+    """
+    def __init__(
+            self,
+            workers: int = KDF_WORKERS,
+            max_pending: int = KDF_MAX_PENDING,
+            processes: bool = False
+        ):
+        self.workers = workers
+        self.max_pending = max_pending
+        # `hashlib.pbkdf2_hmac` releases the GIL, threads are enough unless the GIL is otherwise busy
+        self._executor: Executor = (ProcessPoolExecutor if processes else ThreadPoolExecutor)(workers)
+
+        self.pending = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.peak_pending = 0
+        # the jobs finish on the worker threads, not on the event loop
+        self._lock = threading.Lock()
+
+    @property
+    def queue_depth(self) -> int:
+        """
+        The number of admitted derivations waiting for a worker.
+        """
+        return max(0, self.pending - self.workers)
+
+    def metrics(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'max_pending': self.max_pending,
+                'pending': self.pending,
+                'queue_depth': self.queue_depth,
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+                'peak_pending': self.peak_pending,
+            }
+
+    def _release(self, future: Future | None) -> None:
+        with self._lock:
+            self.pending -= 1
+
+    async def run(self, func: Callable[..., Any], *args) -> Any:
+        """
+        Runs the function on the pool, if it admits it.
+
+        Args:
+            func (Callable[..., Any]): The function, which must be picklable for a process pool.
+            *args: The arguments of the function.
+
+        Returns:
+            Any: The result of the function.
+
+        Raises:
+            OverloadedError: If `max_pending` derivations are already pending.
+        """
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise OverloadedError('Too many password hashes are being computed, try again later')
+
+            self.pending += 1
+            self.admitted += 1
+            self.peak_pending = max(self.peak_pending, self.pending)
+
+        try:
+            future = self._executor.submit(func, *args)
+        except BaseException:
+            self._release(None)
+            raise
+
+        # released when the job is done, not when the caller stops waiting (cancelling the wrapper cancels a queued job)
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown()
+
+
+@lru_cache(maxsize=1)
+def default_pool() -> KdfPool:
+    """
+    Returns the pool shared by the async auth functions, sized by `KDF_WORKERS` and `KDF_MAX_PENDING`.
+    """
+    return KdfPool()
+
+
+async def create_user(username: str, password: str, pool: KdfPool | None = None) -> None:
+    """
+    Creates a new user with the given username and password, without blocking the event loop.
+
+    Args:
+        username (str): The username for the new user.
+        password (str): The password for the new user.
+        pool (KdfPool, optional): The pool hashing the password. Defaults to `default_pool()`.
+
+    Raises:
+        ValueError: If the password is less than 12 characters long.
+        OverloadedError: If the pool does not admit the hashing.
+        UsernameTakenError: If the username already exists.
+    """
+    pool = pool or default_pool()
+
+    hashed_password, salt, scheme = await pool.run(hash_password, password)
+    user = UserModel(username=username, hashed_password=hashed_password, salt=salt, scheme=scheme)
+
+    await asyncio.to_thread(_insert_user, user)
+
+
+async def verify_password(
+        username: str,
+        password: str,
+        pool: KdfPool | None = None,
+        source: str | None = None
+    ) -> bool:
+    """
+    Verify the password for a given username, without blocking the event loop.
+    Attempts beyond the limits of `auth.login_throttle` are rejected before the password is hashed.
+
+    Args:
+        username (str): The username to verify.
+        password (str): The password to verify.
+        pool (KdfPool, optional): The pool hashing the password. Defaults to `default_pool()`.
+        source (str, optional): Where the attempt comes from, e.g. an IP address, limited separately. Defaults to None.
+
+    Returns:
+        bool: True if the password is correct for the given username, False otherwise.
+
+    Raises:
+        ThrottledError: If there were too many failed attempts for the username or from the source.
+        OverloadedError: If the pool does not admit the hashing.
+    """
+    pool = pool or default_pool()
+
+    if not auth.login_throttle.acquire(username, source):
+        raise ThrottledError('Too many login attempts, try again later')
+
+    # an attempt that fails before the password is checked (e.g. the pool is overloaded) does not count against the user
+    try:
+        user = await asyncio.to_thread(_get_user, username)
+        if not user:
+            return False
+
+        valid = await pool.run(check_password, password, user.hashed_password, user.salt, user.scheme)
+    except BaseException:
+        auth.login_throttle.release(username, source)
+        raise
+
+    auth.login_throttle.record(username, source, valid)
+
+    if not valid:
+        return False
+
+    # the password is known now, upgrade a hash made with outdated parameters (unless the pool is busy)
+    if user.needs_rehash():
+        try:
+            user.hashed_password, user.salt, user.scheme = await pool.run(hash_password, password)
+        except OverloadedError:
+            return True
+        await asyncio.to_thread(_save_user, user)
+
+    return True
@@ -1,11 +1,52 @@
 from .models import UserModel
-from .config import get_session
+from .config import _engine, session_scope
+from .throttle import LoginThrottle, ThrottledError
 
-from sqlmodel import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import load_only
+from sqlmodel import Session, select
 
 
-def _session():
-    return next(get_session())
+class UsernameTakenError(ValueError):
+    """
+    Raised when a user is created with a username that already exists.
+    """
+
+
+# limits the login attempts per username and source, shared by the sync and async API
+login_throttle = LoginThrottle()
+
+
+def _session() -> Session:
+    """
+    Returns a new session, to be closed by `session_scope` once the unit of work is done.
+    """
+    return Session(_engine, expire_on_commit=False)
+
+
+def _get_user(username: str) -> UserModel | None:
+    # only the credential columns are loaded
+    with session_scope(_session()) as session:
+        return session.exec(
+            select(UserModel)
+            .options(load_only(UserModel.id, UserModel.hashed_password, UserModel.salt, UserModel.scheme))
+            .where(UserModel.username == username)
+        ).first()
+
+
+def _insert_user(user: UserModel) -> None:
+    # a single insert, the unique constraint checks the username (other violations are not about the username)
+    try:
+        _save_user(user)
+    except IntegrityError as e:
+        if not is_unique_username(user.username):
+            raise UsernameTakenError('Username is already taken') from e
+        raise
+
+
+def _save_user(user: UserModel) -> None:
+    with session_scope(_session()) as session:
+        session.add(user)
 
 
 def create_user(username: str, password: str) -> None:
@@ -18,6 +59,9 @@ def create_user(username: str, password: str) -> None:
 
     Returns:
         None
+
+    Raises:
+        UsernameTakenError: If the username already exists.
     """
 
     user = UserModel(username=username)    
@@ -25,9 +69,7 @@ def create_user(username: str, password: str) -> None:
     user.set_password(password)    
 
     # save user to database
-    session = _session()    
-    session.add(user)
-    session.commit()
+    _insert_user(user)
 
 
 def is_unique_username(username: str) -> bool:
@@ -40,31 +82,51 @@ def is_unique_username(username: str) -> bool:
     Returns:
         bool: True if the username is unique, False otherwise.
     """
-    session = _session()
-    
-    return not session.exec(
-        select(UserModel).where(UserModel.username == username)
-    ).first()
+    with session_scope(_session()) as session:
+        return not session.exec(
+            select(UserModel).where(UserModel.username == username)
+        ).first()
 
 
-def verify_password(username: str, password: str) -> bool:
+def verify_password(username: str, password: str, source: str | None = None) -> bool:
     """
     Verify the password for a given username.
+    Attempts beyond the limits of `login_throttle` are rejected before the password is hashed.
 
     Args:
         username (str): The username to verify.
         password (str): The password to verify.
+        source (str, optional): Where the attempt comes from, e.g. an IP address, limited separately. Defaults to None.
 
     Returns:
         bool: True if the password is correct for the given username, False otherwise.
+
+    Raises:
+        ThrottledError: If there were too many failed attempts for the username or from the source.
     """
-    session = _session()
-    
-    user = session.exec(
-        select(UserModel).where(UserModel.username == username)
-    ).first()
-    
-    if not user:
+    if not login_throttle.acquire(username, source):
+        raise ThrottledError('Too many login attempts, try again later')
+
+    # an attempt that fails before the password is checked does not count against the user
+    try:
+        user = _get_user(username)
+
+        if not user:
+            return False
+
+        valid = user.verify_password(password)
+    except BaseException:
+        login_throttle.release(username, source)
+        raise
+
+    login_throttle.record(username, source, valid)
+
+    if not valid:
         return False
-    
-    return user.verify_password(password)
\ No newline at end of file
+
+    # the password is known now, upgrade a hash made with outdated parameters
+    if user.needs_rehash():
+        user.set_password(password)
+        _save_user(user)
+
+    return True
\ No newline at end of file
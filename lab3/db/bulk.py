@@ -0,0 +1,224 @@
+import os
+import csv
+import json
+import itertools
+from typing import Callable, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy import Insert, Table, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from .config import _engine
+from .models import (
+    MAX_USERNAME_LENGTH,
+    MIN_PASSWORD_LENGTH,
+    MIN_USERNAME_LENGTH,
+    UserModel,
+    check_password,
+    hash_password,
+)
+
+
+# number of users hashed and inserted in a single transaction
+BATCH_SIZE = 1000
+
+# number of usernames looked up in a single query (older SQLite builds allow at most 999 query parameters)
+LOOKUP_BATCH_SIZE = 500
+
+
+def read_users(path: str) -> Iterator[tuple[str, str]]:
+    """
+    Streams the users from a CSV file (with `username` and `password` columns) or a JSON lines file
+    (one `{"username": ..., "password": ...}` object per line), by the extension of the file.
+
+    Args:
+        path (str): The path to the file, `.csv` or `.jsonl`.
+
+    Yields:
+        tuple[str, str]: The username and the password of each user.
+    """
+    with open(path, encoding='utf-8', newline='') as file:
+        if path.endswith('.csv'):
+            for row in csv.DictReader(file):
+                yield row['username'], row['password']
+        else:
+            for line in file:
+                if line.strip():
+                    user = json.loads(line)
+                    yield user['username'], user['password']
+
+
+def _batches(users: Iterable[tuple[str, str]], batch_size: int) -> Iterator[list[tuple[str, str]]]:
+    users = iter(users)
+    while batch := list(itertools.islice(users, batch_size)):
+        yield batch
+
+
+def _existing_usernames(usernames: list[str]) -> set[str]:
+    existing = set()
+    with _engine.connect() as connection:
+        for start in range(0, len(usernames), LOOKUP_BATCH_SIZE):
+            existing.update(connection.scalars(
+                select(UserModel.username).where(UserModel.username.in_(usernames[start:start + LOOKUP_BATCH_SIZE]))
+            ))
+
+    return existing
+
+
+def _chunksize(count: int, workers: int) -> int:
+    # a few chunks per worker, so the pickling overhead is amortized
+    return max(1, count // (4 * workers))
+
+
+def _insert_skipping_conflicts(table: Table, dialect: str) -> Insert | None:
+    # usernames taken meanwhile (e.g. by a concurrent signup) are skipped instead of failing the batch
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return None
+
+    return dialect_insert(table).on_conflict_do_nothing(index_elements=['username'])
+
+
+def _insert(rows: list[dict]) -> int:
+    table = UserModel.__table__
+
+    statement = _insert_skipping_conflicts(table, _engine.dialect.name)
+    if statement is not None:
+        with _engine.begin() as connection:
+            return connection.execute(statement, rows).rowcount
+
+    # without `ON CONFLICT`, a username taken meanwhile fails the whole batch, so it is inserted again row by row
+    try:
+        with _engine.begin() as connection:
+            return connection.execute(insert(table), rows).rowcount
+    except IntegrityError:
+        pass
+
+    inserted = 0
+    for row in rows:
+        try:
+            with _engine.begin() as connection:
+                connection.execute(insert(table), row)
+            inserted += 1
+        except IntegrityError:
+            # other violations are not about the username
+            if not _existing_usernames([row['username']]):
+                raise
+
+    return inserted
+
+
+def import_users(
+        users: Iterable[tuple[str, str]],
+        batch_size: int = BATCH_SIZE,
+        workers: int | None = None,
+        progress: Callable[[dict[str, int]], object] | None = None
+    ) -> dict[str, int]:
+    """
+    Imports many users, hashing their passwords on a process pool and inserting them in batched transactions.
+    Users that already exist are skipped before hashing, so an interrupted import resumes by running it again.
+
+    Args:
+        users (Iterable[tuple[str, str]]): The username and password of each user, e.g. from `read_users`.
+        batch_size (int, optional): The number of users hashed and inserted in a single transaction. Defaults to 1000.
+        workers (int, optional): The number of processes hashing the passwords. Defaults to the number of CPUs.
+        progress (Callable[[dict[str, int]], object], optional): Called with the counts after each batch. Defaults to None.
+
+    Returns:
+        dict[str, int]: The number of users read, imported, skipped (already existing) and invalid (rejected username or password).
+    """
+    counts = dict(read=0, imported=0, skipped=0, invalid=0)
+    workers = workers or os.cpu_count() or 1
+
+    with ProcessPoolExecutor(workers) as executor:
+        for batch in _batches(users, batch_size):
+            counts['read'] += len(batch)
+
+            # duplicates within the batch and users that already exist are skipped, invalid users are not hashed
+            unique = dict(batch)
+            existing = _existing_usernames(list(unique))
+            counts['skipped'] += len(batch) - len(unique) + len(existing)
+
+            new = [(username, password) for username, password in unique.items() if username not in existing]
+            valid = [
+                (username, password) for username, password in new
+                if MIN_USERNAME_LENGTH <= len(username) <= MAX_USERNAME_LENGTH and len(password) >= MIN_PASSWORD_LENGTH
+            ]
+            counts['invalid'] += len(new) - len(valid)
+
+            # the workers only run `models.hash_password`, so they do not import (and set up) the database
+            hashes = executor.map(hash_password, [password for _, password in valid], chunksize=_chunksize(len(valid), workers))
+
+            rows = [
+                {'username': username, 'hashed_password': hashed_password, 'salt': salt, 'scheme': scheme}
+                for (username, _), (hashed_password, salt, scheme) in zip(valid, hashes)
+            ]
+
+            # the users inserted meanwhile are skipped by the insert itself
+            inserted = _insert(rows) if rows else 0
+            counts['imported'] += inserted
+            counts['skipped'] += len(rows) - inserted
+
+            if progress:
+                progress(counts)
+
+    return counts
+
+
+def _credentials(usernames: list[str]) -> dict[str, tuple[bytes, bytes, str]]:
+    credentials = {}
+    with _engine.connect() as connection:
+        for start in range(0, len(usernames), LOOKUP_BATCH_SIZE):
+            credentials.update(
+                (username, (hashed_password, salt, scheme))
+                for username, hashed_password, salt, scheme in connection.execute(
+                    select(UserModel.username, UserModel.hashed_password, UserModel.salt, UserModel.scheme)
+                    .where(UserModel.username.in_(usernames[start:start + LOOKUP_BATCH_SIZE]))
+                )
+            )
+
+    return credentials
+
+
+def verify_users(
+        users: Iterable[tuple[str, str]],
+        batch_size: int = BATCH_SIZE,
+        workers: int | None = None
+    ) -> Iterator[tuple[str, str]]:
+    """
+    Audits many users against the stored credentials, verifying the passwords on a process pool.
+    The credentials are fetched with one query per batch and the login throttle is bypassed.
+
+    Args:
+        users (Iterable[tuple[str, str]]): The username and the expected password of each user, e.g. from `read_users`.
+        batch_size (int, optional): The number of users fetched and verified at once. Defaults to 1000.
+        workers (int, optional): The number of processes verifying the passwords. Defaults to the number of CPUs.
+
+    Yields:
+        tuple[str, str]: The username and its status: 'OK', 'FAILED' or 'MISSING'.
+    """
+    workers = workers or os.cpu_count() or 1
+
+    with ProcessPoolExecutor(workers) as executor:
+        for batch in _batches(users, batch_size):
+            credentials = _credentials(list({username for username, _ in batch}))
+            found = [(username, password) for username, password in batch if username in credentials]
+
+            # the workers only run `models.check_password`, so they do not import (and set up) the database
+            results = executor.map(
+                check_password,
+                [password for _, password in found],
+                *zip(*(credentials[username] for username, _ in found)),
+                chunksize=_chunksize(len(found), workers)
+            )
+
+            # the results come in the order of the found users
+            for username, _ in batch:
+                if username not in credentials:
+                    yield username, 'MISSING'
+                else:
+                    yield username, 'OK' if next(results) else 'FAILED'
+
@@ -0,0 +1,43 @@
+import os
+import sys
+import argparse
+
+
+def main(argv: list[str] | None = None) -> int:
+    # `db.bulk` (and with it the database setup of `db.config`) is only imported here:
+    # under the `spawn` start method every worker imports this module again as `__mp_main__`
+    from .bulk import BATCH_SIZE, import_users, read_users, verify_users
+
+    parser = argparse.ArgumentParser(description='Import users in bulk or audit their passwords.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = subparsers.add_parser('import', help='import the users, skipping the existing ones')
+    verify_parser = subparsers.add_parser('verify', help='check the passwords of the users against the database')
+
+    for subparser in (import_parser, verify_parser):
+        subparser.add_argument('path', help='CSV (username,password) or JSON lines file')
+        subparser.add_argument('-b', '--batch-size', type=int, default=BATCH_SIZE)
+        subparser.add_argument('-j', '--workers', type=int, default=os.cpu_count())
+
+    args = parser.parse_args(argv)
+    users = read_users(args.path)
+
+    if args.command == 'import':
+        def report(counts: dict[str, int]) -> None:
+            print(', '.join(f'{name}: {count}' for name, count in counts.items()), file=sys.stderr)
+
+        import_users(users, args.batch_size, args.workers, report)
+        return 0
+
+    failures = 0
+    for username, status in verify_users(users, args.batch_size, args.workers):
+        if status != 'OK':
+            print(f'{username}: {status}')
+            failures += 1
+
+    print(f'{failures} users failed the audit', file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
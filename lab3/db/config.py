@@ -5,8 +5,12 @@ except ImportError:
     pass
 
 import os
-from typing import Any, Generator
+from contextlib import contextmanager
+from typing import Any, Generator, Iterator
 
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import StaticPool
 from sqlmodel import SQLModel, Session, create_engine
 
 
@@ -14,16 +18,107 @@ conn = os.getenv('CONNECTION_STRING')
 if not conn:
     raise Exception('`CONNECTION_STRING` environment variable is not set')
 
-_engine = create_engine(conn)
+# size of the connection pool and the number of extra connections opened under load
+POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 10))
+# seconds to wait for a free connection before giving up
+POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 30))
+
+# applied to every new SQLite connection
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',      # readers do not block the writer
+    'synchronous': 'NORMAL',    # safe with WAL, without an fsync per commit
+    'busy_timeout': 5000,       # wait for locks instead of failing right away
+    'foreign_keys': 'ON',
+}
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+    cursor.close()
+
+
+def make_engine(
+        url: str,
+        pool_size: int = POOL_SIZE,
+        max_overflow: int = MAX_OVERFLOW,
+        pool_timeout: float = POOL_TIMEOUT
+    ) -> Engine:
+    """
+    Creates an engine with a bounded connection pool.
+    SQLite connections are shared between threads and get the `SQLITE_PRAGMAS`,
+    an in-memory SQLite database uses a single connection (otherwise every connection would see its own database).
+
+    Args:
+        url (str): The connection string.
+        pool_size (int, optional): The number of connections kept open. Defaults to `DB_POOL_SIZE` or 5.
+        max_overflow (int, optional): The number of extra connections opened under load. Defaults to `DB_MAX_OVERFLOW` or 10.
+        pool_timeout (float, optional): The seconds to wait for a free connection. Defaults to `DB_POOL_TIMEOUT` or 30.
+
+    Returns:
+        Engine: The engine.
+    """
+    url = make_url(url)
+
+    if url.get_backend_name() != 'sqlite':
+        return create_engine(
+            url,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=pool_timeout,
+            pool_pre_ping=True
+        )
+
+    if url.database in (None, '', ':memory:'):
+        pool = dict(poolclass=StaticPool)
+    else:
+        pool = dict(pool_size=pool_size, max_overflow=max_overflow, pool_timeout=pool_timeout)
+
+    engine = create_engine(url, connect_args={'check_same_thread': False}, **pool)
+    event.listen(engine, 'connect', _set_sqlite_pragmas)
+
+    return engine
+
+
+_engine = make_engine(conn)
+
+# the models must be imported for their tables to be created
+from . import models
+from .migrations import migrate_binary_credentials
+
 SQLModel.metadata.create_all(_engine)
+migrate_binary_credentials(_engine)
 
 
-from typing import Generator, Any
-from sqlalchemy.orm import Session
+@contextmanager
+def session_scope(session: Session | None = None) -> Iterator[Session]:
+    """
+    A unit of work: commits the session when the block succeeds, rolls it back when it raises,
+    and always closes it, which returns its connection to the pool.
+
+    Args:
+        session (Session, optional): The session to manage. Defaults to a new session.
+
+    Yields:
+        Session: The session.
+    """
+    session = Session(_engine, expire_on_commit=False) if session is None else session
+    try:
+        yield session
+        session.commit()
+    except BaseException:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
 
 def get_session() -> Generator[Session, Any, None]:
     """
     Returns a generator that yields a SQLAlchemy session.
+    The session is only closed when the generator is closed, prefer `session_scope`.
 
     Yields:
         Session: A SQLAlchemy session object.
@@ -31,5 +126,3 @@ def get_session() -> Generator[Session, Any, None]:
     """
     with Session(_engine) as session:
         yield session
-
-
@@ -0,0 +1,114 @@
+import warnings
+
+from sqlalchemy import LargeBinary, MetaData, String, inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from . import passwords
+from .models import UserModel
+
+
+# the scheme of the hashes stored as hex strings before the hashes recorded their parameters
+LEGACY_SCHEME = '$pbkdf2-sha256$i=100000'
+
+# number of rows converted in a single transaction
+MIGRATION_BATCH_SIZE = 1000
+
+
+def _convert(hashed_password: str, salt: str) -> tuple[bytes, bytes, str]:
+    if hashed_password.startswith('$'):
+        algorithm, params, salt, key = passwords.decode(hashed_password)
+        return key, salt, passwords.format_scheme(algorithm, params)
+
+    return bytes.fromhex(hashed_password), bytes.fromhex(salt), LEGACY_SCHEME
+
+
+def _convert_row(id: int, hashed_password: str | None, salt: str | None, invalid: list[int]) -> dict:
+    try:
+        credentials = _convert(hashed_password, salt)
+    except (ValueError, TypeError, AttributeError):
+        # an empty hash never matches, the user keeps the username but has to get a new password
+        invalid.append(id)
+        credentials = b'', b'', LEGACY_SCHEME
+
+    return dict(zip(('hashed_password', 'salt', 'scheme'), credentials), id=id)
+
+
+def _rebuild(connection: Connection, table: str, columns: set[str]) -> None:
+    # SQLite cannot add NOT NULL constraints to existing columns, so the table is made again from the model
+    migrated = UserModel.__table__.to_metadata(MetaData(), name=f'{table}_migrated')
+    migrated.create(connection)
+
+    names = [column.name for column in migrated.columns]
+    sources = [f'new_{name}' if f'new_{name}' in columns else name for name in names]
+    connection.execute(text(
+        f'INSERT INTO {migrated.name} ({", ".join(names)}) SELECT {", ".join(sources)} FROM {table}'
+    ))
+
+    connection.execute(text(f'DROP TABLE {table}'))
+    connection.execute(text(f'ALTER TABLE {migrated.name} RENAME TO {table}'))
+
+    if connection.dialect.name == 'postgresql':
+        # the copied ids do not advance the sequence of the new table
+        connection.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(MAX(id), 0) + 1, false) FROM {table}"
+        ))
+
+
+def migrate_binary_credentials(engine: Engine, batch_size: int = MIGRATION_BATCH_SIZE) -> int:
+    """
+    Converts the hex (or PHC string) hashes and salts of the existing users to binary columns with a separate scheme.
+    The rows are converted in batches of separate transactions, an interrupted migration resumes where it stopped.
+    Rows with malformed credentials get an empty hash, which never matches, and are reported with a warning.
+    The table is then rebuilt with the constraints of the model. Does nothing if the table is already migrated.
+
+    Args:
+        engine (Engine): The engine of the database.
+        batch_size (int, optional): The number of rows converted in a single transaction. Defaults to 1000.
+
+    Returns:
+        int: The number of converted rows.
+    """
+    table = UserModel.__tablename__
+    columns = {column['name']: column for column in inspect(engine).get_columns(table)}
+
+    required = ('hashed_password', 'salt', 'scheme')
+    if all(name in columns and not columns[name]['nullable'] for name in required) and 'new_hashed_password' not in columns:
+        return 0
+
+    binary = LargeBinary().compile(dialect=engine.dialect)
+    string = String(64).compile(dialect=engine.dialect)
+
+    if 'scheme' not in columns:
+        with engine.begin() as connection:
+            connection.execute(text(f'ALTER TABLE {table} ADD COLUMN new_hashed_password {binary}'))
+            connection.execute(text(f'ALTER TABLE {table} ADD COLUMN new_salt {binary}'))
+            connection.execute(text(f'ALTER TABLE {table} ADD COLUMN scheme {string}'))
+        columns = {column['name']: column for column in inspect(engine).get_columns(table)}
+
+    converted = 0
+    invalid = []
+    while 'new_hashed_password' in columns:
+        with engine.begin() as connection:
+            rows = connection.execute(
+                text(f'SELECT id, hashed_password, salt FROM {table} WHERE scheme IS NULL LIMIT :limit'),
+                {'limit': batch_size}
+            ).all()
+            if not rows:
+                break
+
+            connection.execute(
+                text(f'UPDATE {table} SET new_hashed_password = :hashed_password, new_salt = :salt, scheme = :scheme WHERE id = :id'),
+                [_convert_row(id, hashed_password, salt, invalid) for id, hashed_password, salt in rows]
+            )
+            converted += len(rows)
+
+    if invalid:
+        warnings.warn(
+            f'{len(invalid)} users had malformed credentials and cannot sign in until their password is set again '
+            f'(ids: {", ".join(map(str, invalid))})'
+        )
+
+    with engine.begin() as connection:
+        _rebuild(connection, table, set(columns))
+
+    return converted
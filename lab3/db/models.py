@@ -1,15 +1,20 @@
-import os
 import hashlib
 from typing import Optional
 
 from sqlmodel import SQLModel, Field
 
+from . import passwords
+
+
+MIN_PASSWORD_LENGTH = 12
+
+MIN_USERNAME_LENGTH = 6
+MAX_USERNAME_LENGTH = 128
 
-import hashlib
 
 def get_hasher(password: str, salt: str):
     """
-    Returns the hashed password using PBKDF2 algorithm.
+    Returns the hashed password using PBKDF2 algorithm (the legacy format, without the encoded parameters).
 
     Parameters:
     - password (str): The password to be hashed.
@@ -21,6 +26,42 @@ def get_hasher(password: str, salt: str):
     return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), bytes.fromhex(salt), 100_000)
 
 
+def hash_password(password: str) -> tuple[bytes, bytes, str]:
+    """
+    Hashes the password with a new random salt, using the current `passwords.PASSWORD_SCHEME`.
+
+    Parameters:
+    - password (str): The password to be hashed.
+
+    Returns:
+    - tuple[bytes, bytes, str]: The hashed password, the salt and the scheme (algorithm and parameters).
+
+    Raises:
+    - ValueError: If the password is less than 12 characters long.
+    """
+    if len(password) < MIN_PASSWORD_LENGTH:
+        raise ValueError(f'Password must be at least {MIN_PASSWORD_LENGTH} characters long')
+
+    scheme, salt, hashed_password = passwords.derive_new(password)
+    return hashed_password, salt, scheme
+
+
+def check_password(password: str, hashed_password: bytes, salt: bytes, scheme: str) -> bool:
+    """
+    Checks the password against the stored hash and salt.
+
+    Parameters:
+    - password (str): The password to be checked.
+    - hashed_password (bytes): The stored hashed password.
+    - salt (bytes): The stored salt.
+    - scheme (str): The stored scheme (algorithm and parameters).
+
+    Returns:
+    - bool: True if the password matches the hash, False otherwise.
+    """
+    return passwords.check(password, scheme, salt, hashed_password)
+
+
 class UserModel(SQLModel, table=True):
     """
     Represents a user in the system.
@@ -28,18 +69,21 @@ class UserModel(SQLModel, table=True):
     Attributes:
         id (Optional[int]): The user's ID.
         username (str): The user's username.
-        hashed_password (str): The hashed password of the user.
-        salt (str): The salt used for password hashing.
+        hashed_password (bytes): The hashed password of the user.
+        salt (bytes): The salt used for password hashing.
+        scheme (str): The algorithm and parameters of the hash, e.g. `$scrypt$ln=15,r=8,p=1`.
 
     Methods:
         set_password(password: str): Sets the user's password.
         verify_password(password: str) -> bool: Verifies if the provided password matches the user's password.
+        needs_rehash() -> bool: Checks if the password was hashed with outdated parameters.
     """
 
     id: Optional[int] = Field(default=None, primary_key=True)
-    username: str = Field(min_length=6, max_length=128, unique=True, nullable=False)
-    hashed_password: str = Field(nullable=False)
-    salt: str = Field(nullable=False)
+    username: str = Field(min_length=MIN_USERNAME_LENGTH, max_length=MAX_USERNAME_LENGTH, unique=True, nullable=False)
+    hashed_password: bytes = Field(nullable=False)
+    salt: bytes = Field(nullable=False)
+    scheme: str = Field(max_length=64, nullable=False)
     
     def set_password(self, password: str):
         """
@@ -54,16 +98,7 @@ class UserModel(SQLModel, table=True):
         Returns:
             None
         """
-        if len(password) < 12:
-            raise ValueError('Password must be at least 12 characters long')
-
-        # generate a 32-byte salt
-        self.salt = os.urandom(32).hex()
-
-        # create a hash combining the password and the salt using sha-256
-        hasher = get_hasher(password, self.salt)
-
-        self.hashed_password = hasher.hex()
+        self.hashed_password, self.salt, self.scheme = hash_password(password)
 
     def verify_password(self, password: str) -> bool:
         """
@@ -75,7 +110,21 @@ class UserModel(SQLModel, table=True):
         Returns:
             bool: True if the password matches the hashed password, False otherwise.
         """
-        hasher = get_hasher(password, self.salt)
-        return hasher.hex() == self.hashed_password
+        return check_password(password, self.hashed_password, self.salt, self.scheme)
+
+    def needs_rehash(self) -> bool:
+        """
+        Checks if the password was hashed with another algorithm or other parameters than the current ones.
+        The password is rehashed by setting it again.
 
+        Returns:
+            bool: True if the password should be rehashed, False otherwise.
+        """
+        return passwords.needs_rehash(self.scheme)
 
+    @property
+    def encoded_password(self) -> str:
+        """
+        The hash in the PHC string format (see `passwords.encode`), e.g. to export it.
+        """
+        return passwords.encode(*passwords.parse_scheme(self.scheme), self.salt, self.hashed_password)
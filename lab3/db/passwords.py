@@ -0,0 +1,250 @@
+import os
+import hmac
+import time
+import base64
+import hashlib
+import argparse
+
+
+# algorithm and parameters of the new hashes, in the format of the prefix of an encoded hash
+PASSWORD_SCHEME = os.getenv('PASSWORD_SCHEME', '$pbkdf2-sha256$i=100000')
+
+SALT_SIZE = 32
+HASH_SIZE = 32
+
+# parameters of each algorithm, in the order they are encoded
+ALGORITHMS = {
+    'pbkdf2-sha256': ('i',),
+    'pbkdf2-sha512': ('i',),
+    'scrypt': ('ln', 'r', 'p'),
+}
+
+
+def parse_scheme(scheme: str) -> tuple[str, dict[str, int]]:
+    """
+    Parses the algorithm and the parameters, e.g. `$scrypt$ln=15,r=8,p=1`.
+
+    Args:
+        scheme (str): The scheme, or an encoded hash starting with it.
+
+    Returns:
+        tuple[str, dict[str, int]]: The algorithm and its parameters.
+
+    Raises:
+        ValueError: If the algorithm is not supported or the parameters do not match it.
+    """
+    _, algorithm, params, *_ = scheme.split('$') + ['']
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f'Unsupported password hashing algorithm: {algorithm!r}')
+
+    params = dict(param.split('=', 1) for param in params.split(',') if param)
+    if sorted(params) != sorted(ALGORITHMS[algorithm]):
+        raise ValueError(f'{algorithm} requires the parameters {", ".join(ALGORITHMS[algorithm])}')
+
+    return algorithm, {name: int(params[name]) for name in ALGORITHMS[algorithm]}
+
+
+def format_scheme(algorithm: str, params: dict[str, int]) -> str:
+    return f"${algorithm}${','.join(f'{name}={params[name]}' for name in ALGORITHMS[algorithm])}"
+
+
+def derive(algorithm: str, params: dict[str, int], password: str, salt: bytes) -> bytes:
+    """
+    Derives the key of the password with the given algorithm and parameters.
+
+    Args:
+        algorithm (str): One of `ALGORITHMS`.
+        params (dict[str, int]): The parameters of the algorithm.
+        password (str): The password.
+        salt (bytes): The salt.
+
+    Returns:
+        bytes: The derived key of `HASH_SIZE` bytes.
+    """
+    password = password.encode('utf-8')
+
+    if algorithm == 'scrypt':
+        n, r, p = 1 << params['ln'], params['r'], params['p']
+        # the memory needed is 128 * n * r bytes, with some room to spare
+        return hashlib.scrypt(password, salt=salt, n=n, r=r, p=p, maxmem=256 * n * r + (1 << 20), dklen=HASH_SIZE)
+
+    digest = algorithm.removeprefix('pbkdf2-')
+    return hashlib.pbkdf2_hmac(digest, password, salt, params['i'], dklen=HASH_SIZE)
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.b64encode(data).decode('ascii').rstrip('=')
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.b64decode(data + '=' * (-len(data) % 4))
+
+
+def encode(algorithm: str, params: dict[str, int], salt: bytes, key: bytes) -> str:
+    """
+    Encodes a hash in the PHC string format: `$<algorithm>$<parameters>$<salt>$<hash>` (base64 without padding).
+    """
+    return f'{format_scheme(algorithm, params)}${_b64encode(salt)}${_b64encode(key)}'
+
+
+def decode(encoded: str) -> tuple[str, dict[str, int], bytes, bytes]:
+    """
+    Decodes a hash encoded by `encode`.
+
+    Args:
+        encoded (str): The encoded hash.
+
+    Returns:
+        tuple[str, dict[str, int], bytes, bytes]: The algorithm, its parameters, the salt and the derived key.
+
+    Raises:
+        ValueError: If the hash is malformed.
+    """
+    parts = encoded.split('$')
+    if len(parts) != 5 or parts[0]:
+        raise ValueError('Malformed password hash')
+
+    algorithm, params = parse_scheme(encoded)
+    return algorithm, params, _b64decode(parts[3]), _b64decode(parts[4])
+
+
+def derive_new(password: str, scheme: str | None = None, salt: bytes | None = None) -> tuple[str, bytes, bytes]:
+    """
+    Derives the key of the password with the current scheme and a new random salt.
+
+    Args:
+        password (str): The password.
+        scheme (str, optional): The scheme to use. Defaults to `PASSWORD_SCHEME`.
+        salt (bytes, optional): The salt. Defaults to `SALT_SIZE` random bytes.
+
+    Returns:
+        tuple[str, bytes, bytes]: The scheme (normalized), the salt and the derived key.
+    """
+    algorithm, params = parse_scheme(scheme or PASSWORD_SCHEME)
+    salt = os.urandom(SALT_SIZE) if salt is None else salt
+
+    return format_scheme(algorithm, params), salt, derive(algorithm, params, password, salt)
+
+
+def check(password: str, scheme: str, salt: bytes, key: bytes) -> bool:
+    """
+    Checks the password against a derived key, in constant time.
+
+    Args:
+        password (str): The password.
+        scheme (str): The scheme the key was derived with.
+        salt (bytes): The salt.
+        key (bytes): The derived key.
+
+    Returns:
+        bool: True if the password matches the key, False otherwise.
+    """
+    algorithm, params = parse_scheme(scheme)
+    return hmac.compare_digest(derive(algorithm, params, password, salt), key)
+
+
+def hash_password(password: str, scheme: str | None = None, salt: bytes | None = None) -> str:
+    """
+    Hashes the password with the current scheme and a new random salt.
+
+    Args:
+        password (str): The password.
+        scheme (str, optional): The scheme to use. Defaults to `PASSWORD_SCHEME`.
+        salt (bytes, optional): The salt. Defaults to `SALT_SIZE` random bytes.
+
+    Returns:
+        str: The encoded hash.
+    """
+    scheme, salt, key = derive_new(password, scheme, salt)
+    return encode(*parse_scheme(scheme), salt, key)
+
+
+def verify(password: str, encoded: str) -> bool:
+    """
+    Checks the password against an encoded hash, with the algorithm and parameters recorded in it.
+
+    Args:
+        password (str): The password.
+        encoded (str): The encoded hash.
+
+    Returns:
+        bool: True if the password matches the hash, False otherwise.
+    """
+    algorithm, params, salt, key = decode(encoded)
+    return check(password, format_scheme(algorithm, params), salt, key)
+
+
+def needs_rehash(encoded: str, scheme: str | None = None) -> bool:
+    """
+    Checks whether the hash was made with another algorithm or other parameters than the current scheme.
+
+    Args:
+        encoded (str): The encoded hash.
+        scheme (str, optional): The current scheme. Defaults to `PASSWORD_SCHEME`.
+
+    Returns:
+        bool: True if the hash is outdated (or is not an encoded hash), False otherwise.
+    """
+    try:
+        return parse_scheme(encoded) != parse_scheme(scheme or PASSWORD_SCHEME)
+    except ValueError:
+        return True
+
+
+def _time_ms(algorithm: str, params: dict[str, int], repeat: int = 3) -> float:
+    salt = os.urandom(SALT_SIZE)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        derive(algorithm, params, 'calibration password', salt)
+        times.append(time.perf_counter() - start)
+
+    return min(times) * 1e3
+
+
+def calibrate(target_ms: float, algorithm: str = 'pbkdf2-sha256', r: int = 8, p: int = 1) -> tuple[str, float]:
+    """
+    Picks the parameters of the algorithm so a verification takes about `target_ms` on this machine.
+    PBKDF2 scales the iterations linearly, scrypt picks the closest power-of-two cost (`ln`) for the given `r` and `p`.
+
+    Args:
+        target_ms (float): The target time of a single verification in milliseconds.
+        algorithm (str, optional): One of `ALGORITHMS`. Defaults to 'pbkdf2-sha256'.
+        r (int, optional): The block size of scrypt. Defaults to 8.
+        p (int, optional): The parallelism of scrypt. Defaults to 1.
+
+    Returns:
+        tuple[str, float]: The scheme (to set as `PASSWORD_SCHEME`) and its measured time in milliseconds.
+    """
+    if algorithm == 'scrypt':
+        # the time doubles with every step of `ln`, stop at the first one over the target
+        ln, elapsed = 10, _time_ms(algorithm, {'ln': 10, 'r': r, 'p': p})
+        while elapsed < target_ms and ln < 24:
+            previous = elapsed
+            ln += 1
+            elapsed = _time_ms(algorithm, {'ln': ln, 'r': r, 'p': p})
+
+            # the previous step might be closer to the target
+            if elapsed >= target_ms and target_ms / previous < elapsed / target_ms:
+                ln, elapsed = ln - 1, previous
+                break
+
+        params = {'ln': ln, 'r': r, 'p': p}
+    else:
+        probe = 10_000
+        iterations = max(1_000, round(probe * target_ms / _time_ms(algorithm, {'i': probe})))
+        params = {'i': iterations}
+        elapsed = _time_ms(algorithm, params)
+
+    return format_scheme(algorithm, params), elapsed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Calibrate the password hashing parameters to a target verification time.')
+    parser.add_argument('--target-ms', type=float, default=250, help='target time of a single verification')
+    parser.add_argument('-a', '--algorithm', choices=sorted(ALGORITHMS), default='pbkdf2-sha256')
+    args = parser.parse_args()
+
+    scheme, elapsed = calibrate(args.target_ms, args.algorithm)
+    print(f'PASSWORD_SCHEME={scheme}')
+    print(f'# {elapsed:.1f} ms per verification')
@@ -0,0 +1,16 @@
+import unittest
+from unittest.mock import patch
+
+from ..throttle import LoginThrottle
+
+
+def isolate_login_throttle(test_case: unittest.TestCase) -> LoginThrottle:
+    """
+    Replaces the login throttle shared by the auth functions with a fresh one for the duration of the test,
+    so the attempts of other tests (which log in as the same users) do not carry over.
+    """
+    throttle = LoginThrottle()
+    patcher = patch('db.auth.login_throttle', throttle)
+    patcher.start()
+    test_case.addCleanup(patcher.stop)
+    return throttle
@@ -0,0 +1,85 @@
+import asyncio
+import threading
+import unittest
+from unittest.mock import patch
+
+from ..async_auth import KdfPool, OverloadedError, create_user, verify_password
+from ..models import UserModel
+from . import isolate_login_throttle
+
+
+class TestAsyncAuth(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        """Create a small pool for each test."""
+        self.pool = KdfPool(workers=2, max_pending=2)
+        self.addCleanup(self.pool.shutdown)
+        isolate_login_throttle(self)
+
+    @patch('db.auth._session')
+    async def test_create_user(self, mock_session):
+        """Test that create_user hashes the password on the pool and saves the user."""
+        await create_user('testuser', 'password1234', self.pool)
+
+        user = mock_session.return_value.add.call_args.args[0]
+        self.assertTrue(user.verify_password('password1234'))
+        mock_session.return_value.commit.assert_called()
+        self.assertEqual(self.pool.admitted, 1)
+
+    @patch('db.auth._session')
+    async def test_verify_password(self, mock_session):
+        """Test verify_password with correct and incorrect passwords and a missing user."""
+        user = UserModel(username='testuser')
+        user.set_password('password1234')
+        mock_session.return_value.exec.return_value.first.return_value = user
+
+        self.assertTrue(await verify_password('testuser', 'password1234', self.pool))
+        self.assertFalse(await verify_password('testuser', 'wrongpassword', self.pool))
+
+        mock_session.return_value.exec.return_value.first.return_value = None
+        self.assertFalse(await verify_password('nonexistentuser', 'password1234', self.pool))
+
+    async def test_admission_limit(self):
+        """Test that the pool rejects work beyond max_pending and reports its queue depth."""
+        pool = KdfPool(workers=1, max_pending=2)
+        self.addCleanup(pool.shutdown)
+        release = threading.Event()
+
+        tasks = [asyncio.create_task(pool.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        with self.assertRaises(OverloadedError):
+            await pool.run(release.wait)
+        self.assertEqual(pool.queue_depth, 1)
+
+        release.set()
+        await asyncio.gather(*tasks)
+
+        metrics = pool.metrics()
+        self.assertEqual((metrics['admitted'], metrics['rejected'], metrics['pending']), (2, 1, 0))
+        self.assertEqual(metrics['peak_pending'], 2)
+
+
+    async def test_cancelled_callers(self):
+        """Test that jobs of cancelled callers stay pending until they are done, so the limit still holds."""
+        pool = KdfPool(workers=1, max_pending=3)
+        self.addCleanup(pool.shutdown)
+        release = threading.Event()
+
+        tasks = [asyncio.create_task(pool.run(release.wait)) for _ in range(3)]
+        await asyncio.sleep(0)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        # the running job cannot be cancelled, the queued ones are
+        self.assertEqual(pool.pending, 1)
+        with self.assertRaises(OverloadedError):
+            await asyncio.gather(*(pool.run(release.wait) for _ in range(3)))
+
+        release.set()
+        await asyncio.sleep(0.1)
+        self.assertEqual(pool.pending, 0)
+
+if __name__ == '__main__':
+    unittest.main()
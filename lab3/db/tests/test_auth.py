@@ -3,10 +3,14 @@ from unittest.mock import patch, MagicMock
 
 from ..auth import create_user, is_unique_username, verify_password
 from ..models import UserModel  # Adjust the import path based on your project structure
+from . import isolate_login_throttle
 
 
 class TestDBModels(unittest.TestCase):
 
+    def setUp(self):
+        isolate_login_throttle(self)
+
     @patch('db.auth._session')
     def test_create_user(self, mock_session):
         """Test create_user function."""
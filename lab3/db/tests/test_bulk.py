@@ -0,0 +1,120 @@
+import os
+import sys
+import tempfile
+import unittest
+import subprocess
+from unittest.mock import Mock, patch
+
+from sqlmodel import SQLModel
+
+from .. import bulk
+from ..bulk import import_users, read_users, verify_users
+from ..config import make_engine
+
+
+class TestBulk(unittest.TestCase):
+
+    def setUp(self):
+        """Import into a temporary SQLite file, so every run starts from an empty database."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.engine = make_engine(f'sqlite:///{os.path.join(self.directory.name, "test.db")}')
+        SQLModel.metadata.create_all(self.engine)
+
+        patcher = patch('db.bulk._engine', self.engine)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.directory.cleanup()
+
+    def test_import_and_verify(self):
+        """Test that users are imported in batches, skipped when imported again, and audited."""
+        users = [(f'bulkuser{i}', f'password{i:06d}') for i in range(5)]
+        invalid = [('short', 'password123456'), ('bulkuser9', 'short')]
+
+        counts = import_users(users + invalid + users[:1], batch_size=2, workers=1)
+        self.assertEqual(counts, {'read': 8, 'imported': 5, 'skipped': 1, 'invalid': 2})
+
+        counts = import_users(users, batch_size=2, workers=1)
+        self.assertEqual(counts, {'read': 5, 'imported': 0, 'skipped': 5, 'invalid': 0})
+
+        audit = [('bulkuser0', 'password000000'), ('bulkuser1', 'wrongpassword'), ('bulkuser9', 'password000009')]
+        self.assertEqual(
+            list(verify_users(audit, batch_size=2, workers=1)),
+            [('bulkuser0', 'OK'), ('bulkuser1', 'FAILED'), ('bulkuser9', 'MISSING')]
+        )
+
+    @patch('db.bulk.LOOKUP_BATCH_SIZE', 3)
+    def test_lookup_in_chunks(self):
+        """Test that batches larger than a single lookup query are looked up in several."""
+        users = [(f'bulkuser{i}', f'password{i:06d}') for i in range(8)]
+        import_users(users[:5], workers=1)
+
+        counts = import_users(users, workers=1)
+        self.assertEqual(counts, {'read': 8, 'imported': 3, 'skipped': 5, 'invalid': 0})
+        self.assertEqual({status for _, status in verify_users(users, workers=1)}, {'OK'})
+
+    def test_skip_users_inserted_meanwhile(self):
+        """Test that users inserted between the lookup and the insert are counted as skipped, not imported."""
+        users = [(f'bulkuser{i}', f'password{i:06d}') for i in range(3)]
+        import_users(users[:1], workers=1)
+
+        with patch('db.bulk._existing_usernames', return_value=set()):
+            counts = import_users(users, workers=1)
+        self.assertEqual(counts, {'read': 3, 'imported': 2, 'skipped': 1, 'invalid': 0})
+
+    @patch('db.bulk._insert_skipping_conflicts', return_value=None)
+    def test_skip_users_inserted_meanwhile_without_on_conflict(self, _):
+        """Test that a batch failing on a username taken meanwhile is inserted row by row on other databases."""
+        users = [(f'bulkuser{i}', f'password{i:06d}') for i in range(3)]
+        import_users(users[1:2], workers=1)
+
+        # only the lookup before hashing misses the user, the ones after the failed insert see it
+        lookup = Mock(side_effect=lambda usernames: set() if lookup.call_count == 1 else existing_usernames(usernames))
+        existing_usernames = bulk._existing_usernames
+
+        with patch('db.bulk._existing_usernames', lookup):
+            counts = import_users(users, workers=1)
+        self.assertEqual(counts, {'read': 3, 'imported': 2, 'skipped': 1, 'invalid': 0})
+        self.assertGreater(lookup.call_count, 1)
+        self.assertEqual({status for _, status in verify_users(users, workers=1)}, {'OK'})
+
+    def test_workers_do_not_import_config(self):
+        """Test that the functions run on the process pool do not set up the database when imported."""
+        self.assertEqual({bulk.hash_password.__module__, bulk.check_password.__module__}, {'db.models'})
+
+        code = 'import sys, db.models; sys.exit("db.config" in sys.modules)'
+        directory = os.path.dirname(os.path.dirname(bulk.__file__))
+        self.assertEqual(subprocess.run([sys.executable, '-c', code], cwd=directory).returncode, 0)
+
+
+    def test_cli_with_spawn(self):
+        """Test that the command line imports users on a `spawn` process pool, whose workers cannot set up the database."""
+        path = os.path.join(self.directory.name, 'users.csv')
+        with open(path, 'w', encoding='utf-8', newline='') as file:
+            file.write('username,password\nbulkuser0,password000000\nbulkuser1,password000001\n')
+
+        # the database is set up before the workers start, then its connection string is removed from their environment,
+        # so a worker that imports `db.config` (e.g. by importing the main module again) fails the import
+        code = '\n'.join([
+            'import os, sys, runpy, multiprocessing',
+            'import db.config',
+            'del os.environ["CONNECTION_STRING"]',
+            'multiprocessing.set_start_method("spawn")',
+            f'sys.argv = ["bulk_cli", "import", {path!r}, "-j", "2"]',
+            'runpy.run_module("db.bulk_cli", run_name="__main__", alter_sys=True)',
+        ])
+        directory = os.path.dirname(os.path.dirname(bulk.__file__))
+        environment = {**os.environ, 'CONNECTION_STRING': f'sqlite:///{os.path.join(self.directory.name, "test.db")}'}
+        result = subprocess.run(
+            [sys.executable, '-c', code], cwd=directory, env=environment, capture_output=True, text=True, timeout=60
+        )
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn('imported: 2', result.stderr)
+        self.assertEqual({status for _, status in verify_users(read_users(path), workers=1)}, {'OK'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import create_engine, inspect, text
+from sqlmodel import Session, select
+
+from ..migrations import migrate_binary_credentials
+from ..models import UserModel, get_hasher
+from ..passwords import hash_password
+
+
+class TestMigrateBinaryCredentials(unittest.TestCase):
+
+    def setUp(self):
+        """Create a database with the hex credential columns and two users."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.engine = create_engine(f'sqlite:///{os.path.join(self.directory.name, "test.db")}')
+
+        legacy_salt = os.urandom(32).hex()
+        with self.engine.begin() as connection:
+            connection.execute(text(
+                'CREATE TABLE usermodel (id INTEGER PRIMARY KEY, username VARCHAR(128) NOT NULL UNIQUE, '
+                'hashed_password VARCHAR NOT NULL, salt VARCHAR NOT NULL)'
+            ))
+            connection.execute(text('INSERT INTO usermodel VALUES (:id, :username, :hashed_password, :salt)'), [
+                {'id': 1, 'username': 'legacyuser', 'hashed_password': get_hasher('password1234', legacy_salt).hex(), 'salt': legacy_salt},
+                {'id': 2, 'username': 'encodeduser', 'hashed_password': hash_password('password5678', '$scrypt$ln=10,r=8,p=1'), 'salt': ''},
+            ])
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.directory.cleanup()
+
+    def test_migration(self):
+        """Test that both hash formats are converted and still verify, and that a second run does nothing."""
+        self.assertEqual(migrate_binary_credentials(self.engine, batch_size=1), 2)
+        self.assertEqual(migrate_binary_credentials(self.engine), 0)
+
+        with Session(self.engine) as session:
+            users = {user.username: user for user in session.exec(select(UserModel))}
+
+        self.assertEqual(users['legacyuser'].scheme, '$pbkdf2-sha256$i=100000')
+        self.assertEqual(len(users['legacyuser'].hashed_password), 32)
+        self.assertTrue(users['legacyuser'].verify_password('password1234'))
+        self.assertEqual(users['encodeduser'].scheme, '$scrypt$ln=10,r=8,p=1')
+        self.assertTrue(users['encodeduser'].verify_password('password5678'))
+        self.assertFalse(users['encodeduser'].verify_password('password1234'))
+
+        columns = {column['name']: column for column in inspect(self.engine).get_columns('usermodel')}
+        self.assertEqual(set(columns), {'id', 'username', 'hashed_password', 'salt', 'scheme'})
+        self.assertFalse(any(column['nullable'] for name, column in columns.items() if name != 'id'))
+
+        # the ids go on after the copied rows
+        with Session(self.engine) as session:
+            user = UserModel(username='newuser')
+            user.set_password('password9012')
+            session.add(user)
+            session.commit()
+            self.assertEqual(user.id, 3)
+
+    def test_malformed_rows(self):
+        """Test that malformed credentials are reported and locked instead of failing the migration."""
+        with self.engine.begin() as connection:
+            connection.execute(text('INSERT INTO usermodel VALUES (3, :username, :hashed_password, :salt)'), [
+                {'username': 'malformeduser', 'hashed_password': 'not hex', 'salt': 'abcd'},
+            ])
+
+        with self.assertWarnsRegex(UserWarning, r'1 users.*ids: 3'):
+            self.assertEqual(migrate_binary_credentials(self.engine), 3)
+
+        with Session(self.engine) as session:
+            user = session.exec(select(UserModel).where(UserModel.username == 'malformeduser')).one()
+        self.assertEqual(user.hashed_password, b'')
+        self.assertFalse(user.verify_password('not hex'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+from unittest.mock import patch
+
+from ..auth import verify_password
+from ..models import UserModel, get_hasher
+from ..passwords import PASSWORD_SCHEME, decode, derive_new, hash_password, needs_rehash, parse_scheme, verify
+from . import isolate_login_throttle
+
+
+class TestPasswords(unittest.TestCase):
+
+    def setUp(self):
+        isolate_login_throttle(self)
+
+    def test_encoded_hash(self):
+        """Test that the encoded hash records the algorithm and parameters it was made with."""
+        encoded = hash_password('password1234', '$scrypt$ln=10,r=8,p=1')
+        algorithm, params, salt, key = decode(encoded)
+
+        self.assertEqual((algorithm, params), ('scrypt', {'ln': 10, 'r': 8, 'p': 1}))
+        self.assertEqual((len(salt), len(key)), (32, 32))
+        self.assertTrue(verify('password1234', encoded))
+        self.assertFalse(verify('wrongpassword', encoded))
+
+    def test_parse_scheme_invalid(self):
+        """Test that unsupported algorithms and missing parameters are rejected."""
+        with self.assertRaises(ValueError):
+            parse_scheme('$md5$i=1')
+        with self.assertRaises(ValueError):
+            parse_scheme('$scrypt$ln=10')
+
+    def test_needs_rehash(self):
+        """Test that hashes with other parameters and legacy hashes need rehashing."""
+        self.assertFalse(needs_rehash(hash_password('password1234')))
+        self.assertTrue(needs_rehash(hash_password('password1234', '$pbkdf2-sha256$i=1000')))
+        self.assertTrue(needs_rehash(get_hasher('password1234', 'abcd').hex()))
+
+    @patch('db.auth._session')
+    def test_rehash_on_login(self, mock_session):
+        """Test that a successful login upgrades a hash made with outdated parameters."""
+        scheme, salt, hashed_password = derive_new('password1234', '$pbkdf2-sha256$i=1000')
+        user = UserModel(username='testuser', hashed_password=hashed_password, salt=salt, scheme=scheme)
+        mock_session.return_value.exec.return_value.first.return_value = user
+
+        self.assertTrue(verify_password('testuser', 'password1234'))
+
+        mock_session.return_value.add.assert_called_with(user)
+        self.assertEqual(user.scheme, PASSWORD_SCHEME)
+        self.assertTrue(user.verify_password('password1234'))
+
+
+if __name__ == '__main__':
+    unittest.main()
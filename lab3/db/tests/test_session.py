@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import SQLModel, Session, select
+
+from ..auth import UsernameTakenError, _insert_user, create_user, is_unique_username, verify_password
+from ..config import make_engine, session_scope
+from ..models import UserModel
+from . import isolate_login_throttle
+
+
+class TestSessionScope(unittest.TestCase):
+
+    def setUp(self):
+        """Create a pooled engine on a temporary SQLite file and count its open connections."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.engine = make_engine(f'sqlite:///{os.path.join(self.directory.name, "test.db")}', pool_size=4, max_overflow=4)
+        SQLModel.metadata.create_all(self.engine)
+
+        self.connections = self.peak = 0
+
+        def opened(*args):
+            self.connections += 1
+            self.peak = max(self.peak, self.connections)
+
+        def closed(*args):
+            self.connections -= 1
+
+        event.listen(self.engine, 'connect', opened)
+        event.listen(self.engine, 'close', closed)
+
+        patcher = patch('db.auth._session', lambda: Session(self.engine, expire_on_commit=False))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        isolate_login_throttle(self)
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.directory.cleanup()
+
+    def test_connection_count_stays_flat(self):
+        """Test that 10k concurrent auth calls reuse the pooled connections."""
+        create_user('existinguser', 'password1234')
+
+        def call(i: int) -> bool:
+            if i % 2:
+                return is_unique_username(f'user{i}')
+            return verify_password(f'missinguser{i}', 'password1234')
+
+        with ThreadPoolExecutor(8) as executor:
+            results = list(executor.map(call, range(10_000)))
+
+        self.assertEqual(results.count(True), 5_000)
+        # never more than the pool size plus the overflow, and back to the pool size afterwards
+        self.assertLessEqual(self.peak, 8)
+        self.assertLessEqual(self.connections, 4)
+        self.assertEqual(self.engine.pool.checkedout(), 0)
+
+    def test_wal_mode(self):
+        """Test that SQLite connections are switched to WAL mode."""
+        with self.engine.connect() as connection:
+            self.assertEqual(connection.exec_driver_sql('PRAGMA journal_mode').scalar(), 'wal')
+
+    def test_rollback_on_error(self):
+        """Test that session_scope rolls the unit of work back when it raises."""
+        with self.assertRaises(RuntimeError):
+            with session_scope(Session(self.engine)) as session:
+                session.add(UserModel(username='rolledback', hashed_password=b'', salt=b'', scheme=''))
+                session.flush()
+                raise RuntimeError
+
+        with session_scope(Session(self.engine)) as session:
+            self.assertIsNone(session.exec(select(UserModel)).first())
+        self.assertEqual(self.engine.pool.checkedout(), 0)
+
+
+    def test_username_taken(self):
+        """Test that only a duplicate username is reported as taken, other violations are raised as they are."""
+        create_user('existinguser', 'password1234')
+        with self.assertRaises(UsernameTakenError):
+            create_user('existinguser', 'password5678')
+
+        with self.assertRaises(IntegrityError):
+            _insert_user(UserModel(username='otheruser', hashed_password=None, salt=b'', scheme=''))
+
+if __name__ == '__main__':
+    unittest.main()
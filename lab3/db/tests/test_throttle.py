@@ -0,0 +1,130 @@
+import asyncio
+import unittest
+from unittest.mock import patch, MagicMock
+
+from .. import async_auth
+from ..auth import verify_password
+from ..throttle import LoginThrottle, ThrottledError, TokenBuckets
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestTokenBuckets(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.buckets = TokenBuckets(capacity=2, rate=1, max_entries=3, clock=self.clock)
+
+    def test_refill(self):
+        """Test that taken tokens come back over time, up to the capacity."""
+        self.buckets.add('user', -2)
+        self.assertEqual(self.buckets.tokens('user'), 0)
+
+        self.clock.now = 1.5
+        self.assertEqual(self.buckets.tokens('user'), 1.5)
+
+        self.clock.now = 10
+        self.assertEqual(self.buckets.tokens('user'), 2)
+
+    def test_eviction(self):
+        """Test that the least recently used buckets are evicted beyond max_entries, and idle ones after they refill."""
+        for key in 'abcd':
+            self.buckets.add(key, -1)
+
+        self.assertEqual(len(self.buckets), 3)
+        self.assertEqual(self.buckets.tokens('a'), 2)
+
+        self.clock.now = 2
+        self.buckets.tokens('b')
+        self.assertEqual(len(self.buckets), 0)
+
+
+class TestLoginThrottle(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.throttle = LoginThrottle(
+            username_capacity=3, username_rate=0.1,
+            source_capacity=5, source_rate=0.1,
+            clock=self.clock
+        )
+
+    def test_source_limit(self):
+        """Test that a source is limited across usernames."""
+        results = [self.throttle.acquire(f'user{i}', '10.0.0.1') for i in range(6)]
+
+        self.assertEqual(results, [True] * 5 + [False])
+        self.assertTrue(self.throttle.acquire('user0', '10.0.0.2'))
+
+    @patch('db.auth._session')
+    def test_rejected_before_kdf(self, mock_session):
+        """Test that excess failed attempts are rejected without verifying the password."""
+        mock_user = MagicMock()
+        mock_user.verify_password.return_value = False
+        mock_session.return_value.exec.return_value.first.return_value = mock_user
+
+        with patch('db.auth.login_throttle', self.throttle):
+            for _ in range(3):
+                self.assertFalse(verify_password('testuser', 'wrongpassword', '10.0.0.1'))
+
+            with self.assertRaises(ThrottledError):
+                verify_password('testuser', 'wrongpassword', '10.0.0.1')
+
+            # a token comes back after 10 seconds
+            self.clock.now = 10
+            self.assertFalse(verify_password('testuser', 'wrongpassword', '10.0.0.1'))
+
+        self.assertEqual(mock_user.verify_password.call_count, 4)
+        self.assertEqual(self.throttle.metrics()['rejected'], 1)
+        self.assertEqual(self.throttle.metrics()['computed'], 4)
+
+    @patch('db.auth._session')
+    def test_success_gives_token_back(self, mock_session):
+        """Test that successful logins do not use up the attempts."""
+        mock_user = MagicMock()
+        mock_user.verify_password.return_value = True
+        mock_user.needs_rehash.return_value = False
+        mock_session.return_value.exec.return_value.first.return_value = mock_user
+
+        with patch('db.auth.login_throttle', self.throttle):
+            for _ in range(10):
+                self.assertTrue(verify_password('testuser', 'correctpassword'))
+
+
+    @patch('db.auth._session')
+    def test_refund_when_not_checked(self, mock_session):
+        """Test that attempts failing before the password is checked give their tokens back."""
+        mock_session.return_value.exec.side_effect = RuntimeError('database is down')
+
+        with patch('db.auth.login_throttle', self.throttle):
+            for _ in range(5):
+                with self.assertRaises(RuntimeError):
+                    verify_password('testuser', 'password1234', '10.0.0.1')
+
+        self.assertEqual(self.throttle.usernames.tokens('testuser'), 3)
+        self.assertEqual(self.throttle.sources.tokens('10.0.0.1'), 5)
+
+    @patch('db.auth._session')
+    def test_refund_when_overloaded(self, mock_session):
+        """Test that attempts rejected by the key derivation pool give their tokens back."""
+        mock_session.return_value.exec.return_value.first.return_value = MagicMock()
+        pool = MagicMock()
+        pool.run.side_effect = async_auth.OverloadedError
+
+        with patch('db.auth.login_throttle', self.throttle):
+            for _ in range(5):
+                with self.assertRaises(async_auth.OverloadedError):
+                    asyncio.run(async_auth.verify_password('testuser', 'password1234', pool))
+
+        self.assertEqual(self.throttle.usernames.tokens('testuser'), 3)
+        self.assertEqual(self.throttle.metrics()['computed'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
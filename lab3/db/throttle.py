@@ -0,0 +1,172 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+
+# login attempts allowed at once per username and per source, and how fast they come back (per second)
+USERNAME_CAPACITY, USERNAME_RATE = 10, 10 / 60
+SOURCE_CAPACITY, SOURCE_RATE = 100, 100 / 60
+
+# number of tracked usernames (and sources), the least recently used ones are forgotten first
+MAX_ENTRIES = 100_000
+
+
+class ThrottledError(RuntimeError):
+    """
+    Raised when a login attempt is rejected by the throttle.
+    """
+
+
+class TokenBuckets:
+    """
+    Token buckets keyed by e.g. a username, refilled continuously up to their capacity.
+    At most `max_entries` buckets are kept (the least recently used are evicted first),
+    and a bucket idle long enough to be full again is dropped, as it is the same as a new one.
+    Not thread-safe on its own, `LoginThrottle` guards it with a lock.
+
+    Attributes:
+        capacity (float): The number of tokens of a full bucket.
+        rate (float): The number of tokens added per second.
+        max_entries (int): The number of buckets kept.
+    """
+    def __init__(
+            self,
+            capacity: float,
+            rate: float,
+            max_entries: int = MAX_ENTRIES,
+            clock: Callable[[], float] = time.monotonic
+        ):
+        self.capacity = capacity
+        self.rate = rate
+        self.max_entries = max_entries
+        self._clock = clock
+        self._ttl = capacity / rate
+
+        # key -> (tokens, time of the last update), in the order of use
+        self._buckets: OrderedDict[Hashable, tuple[float, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def _expire(self, now: float) -> None:
+        while self._buckets:
+            key, (_, updated) = next(iter(self._buckets.items()))
+            if now - updated < self._ttl:
+                break
+            del self._buckets[key]
+
+    def tokens(self, key: Hashable) -> float:
+        """
+        Returns the number of tokens in the bucket of the key.
+        """
+        now = self._clock()
+        self._expire(now)
+
+        tokens, updated = self._buckets.get(key, (self.capacity, now))
+        return min(self.capacity, tokens + (now - updated) * self.rate)
+
+    def add(self, key: Hashable, tokens: float) -> None:
+        """
+        Adds (or takes, if negative) tokens to the bucket of the key, marking it as the most recently used.
+        """
+        now = self._clock()
+        tokens = min(self.capacity, self.tokens(key) + tokens)
+
+        self._buckets[key] = tokens, now
+        self._buckets.move_to_end(key)
+
+        while len(self._buckets) > self.max_entries:
+            self._buckets.popitem(last=False)
+
+
+class LoginThrottle:
+    """
+    Limits the login attempts per username and per source (e.g. an IP address), so the key derivation
+    of excess attempts is never run. An attempt takes a token from both buckets, a successful login gives it back.
+
+    Attributes:
+        usernames (TokenBuckets): The buckets of the usernames.
+        sources (TokenBuckets): The buckets of the sources.
+        rejected (int): The number of attempts rejected without running the key derivation.
+        computed (int): The number of attempts that ran the key derivation.
+    """
+    def __init__(
+            self,
+            username_capacity: float = USERNAME_CAPACITY,
+            username_rate: float = USERNAME_RATE,
+            source_capacity: float = SOURCE_CAPACITY,
+            source_rate: float = SOURCE_RATE,
+            max_entries: int = MAX_ENTRIES,
+            clock: Callable[[], float] = time.monotonic
+        ):
+        self.usernames = TokenBuckets(username_capacity, username_rate, max_entries, clock)
+        self.sources = TokenBuckets(source_capacity, source_rate, max_entries, clock)
+
+        self.rejected = 0
+        self.computed = 0
+        self._lock = threading.Lock()
+
+    def _buckets(self, username: str, source: str | None) -> list[tuple[TokenBuckets, Hashable]]:
+        buckets = [(self.usernames, username)]
+        if source is not None:
+            buckets.append((self.sources, source))
+        return buckets
+
+    def acquire(self, username: str, source: str | None = None) -> bool:
+        """
+        Takes a token for a login attempt, if both the username and the source have one left.
+
+        Args:
+            username (str): The username of the attempt.
+            source (str, optional): The source of the attempt, e.g. an IP address. Defaults to None (not limited).
+
+        Returns:
+            bool: True if the attempt may go on, False if it is rejected.
+        """
+        with self._lock:
+            buckets = self._buckets(username, source)
+            if any(bucket.tokens(key) < 1 for bucket, key in buckets):
+                self.rejected += 1
+                return False
+
+            for bucket, key in buckets:
+                bucket.add(key, -1)
+            return True
+
+    def release(self, username: str, source: str | None = None) -> None:
+        """
+        Gives back the tokens of an attempt that did not get to check the password,
+        e.g. because the database failed or the key derivation pool was overloaded.
+
+        Args:
+            username (str): The username of the attempt.
+            source (str, optional): The source of the attempt.
+        """
+        with self._lock:
+            for bucket, key in self._buckets(username, source):
+                bucket.add(key, 1)
+
+    def record(self, username: str, source: str | None, success: bool) -> None:
+        """
+        Records an attempt that ran the key derivation, giving its tokens back if it succeeded.
+
+        Args:
+            username (str): The username of the attempt.
+            source (str, optional): The source of the attempt.
+            success (bool): Whether the password was correct.
+        """
+        with self._lock:
+            self.computed += 1
+            if success:
+                for bucket, key in self._buckets(username, source):
+                    bucket.add(key, 1)
+
+    def metrics(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                'rejected': self.rejected,
+                'computed': self.computed,
+                'usernames': len(self.usernames),
+                'sources': len(self.sources),
+            }
@@ -1,4 +1,6 @@
-from db.auth import create_user, is_unique_username, verify_password
+from db.auth import UsernameTakenError, create_user, verify_password
+from db.models import MAX_USERNAME_LENGTH, MIN_PASSWORD_LENGTH, MIN_USERNAME_LENGTH
+from db.throttle import ThrottledError
 
 
 def sign_up():
@@ -6,14 +8,7 @@ def sign_up():
     print('= ' * 20)
 
     # Get username
-    while True: 
-        username = input('Username: ')
-        try:
-            is_valid_username(username)
-        except ValueError as e:
-            print(e)
-            continue
-        break
+    username = input_username()
     
     # Get password
     while True:
@@ -32,16 +27,34 @@ def sign_up():
             break
         print('Passwords do not match')
 
-    try:
-        create_user(username, password)
-    except Exception as e:
-        print(e)
-        print('User could not be signed up')
-        return
+    # Ask for another username until one is free, the password is kept
+    while True:
+        try:
+            create_user(username, password)
+        except UsernameTakenError as e:
+            print(e)
+            username = input_username()
+            continue
+        except Exception as e:
+            print(e)
+            print('User could not be signed up')
+            return
+        break
     
     print('User signed up successfully')    
 
 
+def input_username() -> str:
+    while True: 
+        username = input('Username: ')
+        try:
+            is_valid_username(username)
+        except ValueError as e:
+            print(e)
+            continue
+        return username
+
+
 def sign_in():
     print('Sign up form')
     print('= ' * 20)
@@ -57,21 +70,23 @@ def sign_in():
 
 
 def is_valid_username(username: str):
-    if len(username) < 6:
-        raise ValueError('Username must be at least 6 characters long')
-    if len(username) > 128:
-        raise ValueError('Username must be at most 128 characters long')
-    if not is_unique_username(username):
-        raise ValueError('Username is already taken')
+    if len(username) < MIN_USERNAME_LENGTH:
+        raise ValueError(f'Username must be at least {MIN_USERNAME_LENGTH} characters long')
+    if len(username) > MAX_USERNAME_LENGTH:
+        raise ValueError(f'Username must be at most {MAX_USERNAME_LENGTH} characters long')
     
 
 def is_valid_password(password: str):
-    if len(password) < 12:
-        raise ValueError('Password must be at least 12 characters long')
+    if len(password) < MIN_PASSWORD_LENGTH:
+        raise ValueError(f'Password must be at least {MIN_PASSWORD_LENGTH} characters long')
     if len(password) > 1024:
         raise ValueError('Password must be at most 1024 characters long')
     
 
 def try_sign_in(username: str, password: str):
-    return verify_password(username, password)
+    try:
+        return verify_password(username, password)
+    except ThrottledError as e:
+        print(e)
+        return False
     